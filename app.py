@@ -1,14 +1,16 @@
 # app.py
 import streamlit as st
 import os
-from src.data_loader import load_galaxy_data, list_available_galaxies
-from src.sound_mapper import map_values_to_midi_notes, map_to_velocity
-from src.midi_generator import create_midi_file
+from src.catalog import refresh_catalog, search_galaxies, get_galaxy
+from src.image_pipeline import get_preview
+from src.ingest import parse_spectrum_bytes, InvalidSpectrumError
+from src.rest_frame import resample_batch
+from src.line_detector import KNOWN_LINES
+from src.scales import SCALES, DEFAULT_SCALE
 import plotly.graph_objects as go
 from src.midi_generator import convert_midi_to_wav
-from funciones import sonificar_galaxia, cargar_datos
+from funciones import sonificar_galaxia, cargar_espectro, detectar_region_plana
 from funciones import graficar_galaxia_plotly
-import matplotlib.pyplot as plt
 
 # Inicializar st.session_state
 if "midi_generado" not in st.session_state:
@@ -22,6 +24,17 @@ MIDI_OUTPUT = "output.mid"
 WAV_OUTPUT = "output.wav"
 SOUNDFONT_PATH = "FluidR3_GM.sf2"
 #SOUNDFONT_PATH = "GeneralUser-GS.sf2"
+# Ancho (px) de la miniatura para la columna de imagen (1/3 del layout ancho, pantallas HiDPI)
+ANCHO_IMAGEN = 640
+
+
+@st.cache_resource(max_entries=64)
+def cargar_espectro_archivo(ruta, mtime_ns):
+    # mtime_ns forma parte de la clave: si el archivo cambia se vuelve a leer.
+    # El Spectrum es de solo lectura, así que se comparte entre reruns sin copiarlo
+    # y conserva lo que ya se calculó (región plana, líneas).
+    return cargar_espectro(ruta)
+
 
 # Streamlit le crea webs sin complique y las llama desde python
 st.set_page_config(page_title="Sonificación Galáctica", layout="wide")
@@ -34,7 +47,7 @@ st.markdown(
     Galaxy Sonification es una aplicación interactiva que transforma los espectros electromagnéticos de las galaxias en paisajes sonoros, permitiendo identificar características distintivas según su tipo morfológico. Aunque existen tres tipos principales de galaxias —elípticas, espirales e irregulares—, la aplicación ofrece actualmente dos modos específicos de sonificación: uno para galaxias elípticas y otro para espirales. Sin embargo, también puedes cargar espectros de galaxias irregulares y experimentar con ambos modos para descubrir nuevas formas de representación sonora.
     """
 )
-st.info("Para una generación más rápida del audio, te recomendamos utilizar tempos altos o seleccionar duraciones cortas para las notas, como corcheas o semicorcheas. Esto no solo agiliza el procesamiento, sino que también permite una exploración más fluida del contenido espectral.")
+st.info("Para una generación más rápida del audio, te recomendamos activar la opción «Limitar la duración del audio», utilizar tempos altos o seleccionar duraciones cortas para las notas, como corcheas o semicorcheas. Esto no solo agiliza el procesamiento, sino que también permite una exploración más fluida del contenido espectral.")
 # Paso 1: Selección de galaxia y carga de archivo en columnas
 col_galaxia, col_upload = st.columns([2, 1])
 
@@ -43,7 +56,10 @@ with col_upload:
     uploaded_file = st.file_uploader("", type=["txt"])
 
 with col_galaxia:
-    galaxias = list_available_galaxies(DATA_DIR)
+    # El catálogo solo vuelve a leer los espectros que cambiaron desde la última vez
+    refresh_catalog(DATA_DIR)
+    busqueda = st.text_input("Buscar galaxia:", "", placeholder="NGC_")
+    galaxias = search_galaxies(busqueda.strip())
     # Si hay archivo subido, agregar su nombre a la lista de galaxias (si no está)
     if uploaded_file is not None:
         nombre_txt_usuario = uploaded_file.name
@@ -55,67 +71,17 @@ with col_galaxia:
 
     galaxia = st.selectbox("Selecciona una galaxia:", galaxias, index=galaxias.index(galaxia_default) if galaxia_default in galaxias else 0)
 
-# Diccionario de descripciones (puedes ampliarlo con tus propias descripciones)
-descripciones_galaxias = {
-    "NGC_6643.txt": "NGC 6643 es una galaxia espiral ubicada en la constelación de Draco.",
-    "NGC_1300.txt": "NGC 1300 es una galaxia espiral barrada situada en la constelación de Eridanus.",
-    "NGC_3370.txt": "NGC 3370 es una galaxia espiral en la constelación de Leo.",
-    "NGC_4881.txt": "NGC 4881 es una galaxia elíptica en el cúmulo de Coma.",
-    "NGC_1569.txt": (
-        "NGC 1569 es una galaxia irregular enana ubicada en la constelación de la Jirafa a 11 millones años luz.\n"
-        "La galaxia llamada NGC 1569 brilla intensamente gracias a la luz de millones de estrellas jóvenes que se han formado recientemente.\n"
-        "NGC 1569 está formando estrellas a un ritmo 100 veces más rápido que el observado en nuestra propia galaxia, la Vía Láctea.\n"
-        "Este ritmo frenético de formación estelar ha continuado casi sin pausa durante los últimos 100 millones de años.\n"
-        "En el centro de la galaxia se encuentra un grupo de tres cúmulos estelares gigantes, cada uno con más de un millón de estrellas. "
-        "(Dos de estos cúmulos están tan cerca entre sí que parecen uno solo). Estos cúmulos están ubicados en una gran cavidad central, "
-        "cuyo gas ha sido expulsado por la acción de muchas estrellas masivas y jóvenes que ya explotaron como supernovas.\n"
-        "Estas explosiones también provocaron un flujo violento de gas y partículas que ha esculpido enormes estructuras de gas. "
-        "Una de estas estructuras, visible en la parte inferior derecha, mide unos 3,700 años luz de longitud.\n"
-        "Información y figura tomadas de https://science.nasa.gov/asset/hubble/starburst-galaxy-ngc-1569/"
-    ),
-    "NGC_2276.txt": (
-        "NGC 2276 es una galaxia espiral en interacción. En la mayoría de las galaxias espirales, el centro suele mostrar un núcleo brillante compuesto por estrellas más viejas de color amarillento. "
-        "Sin embargo, en el caso de NGC 2276, ese núcleo parece estar desplazado hacia la parte superior izquierda. "
-        "Esto se debe a que una galaxia vecina situada a la derecha de NGC 2276 (NGC 2300, que no aparece en la imagen) la está atrayendo gravitacionalmente. "
-        "Esa fuerza está tirando del disco de estrellas azules en un lado, distorsionando la forma típica de 'huevo frito' que suelen tener estas galaxias. "
-        "Este tipo de “tira y afloja” entre galaxias cercanas no es raro en el universo. Sin embargo, al igual que los copos de nieve, ningún encuentro cercano entre galaxias es exactamente igual a otro. "
-        "Además, en el borde superior izquierdo de NGC 2276 se forma un brazo azul brillante, compuesto por estrellas jóvenes y masivas de corta vida. "
-        "Estas estrellas marcan una región de intensa formación estelar, que pudo haber sido provocada por una colisión anterior con una galaxia enana. "
-        "También es posible que se deba a que NGC 2276 se esté desplazando a través del gas sobrecalentado que se encuentra entre galaxias en los cúmulos galácticos. "
-        "Al atravesar este gas, se comprime y colapsa, dando lugar al nacimiento masivo de nuevas estrellas. "
-        "La galaxia espiral NGC 2276 se encuentra a unos 120 millones de años luz, en la constelación boreal de Cefeo. "
-        "Información y figura tomadas de https://science.nasa.gov/asset/hubble/ngc-2276/"
-    ),
-    "NGC_3379.txt": (
-        "M105 (también conocida como NGC 3379) es una galaxia elíptica que se encuentra a unos 32 millones de años luz de distancia, en la constelación de Leo. Es la galaxia elíptica más grande del catálogo de Messier que no forma parte del cúmulo de Virgo. Sin embargo, M105 sí pertenece al Grupo de M96 (o Leo I), junto con sus vecinas M95, M96 y varias otras galaxias más débiles.\n"
-        "La galaxia fue descubierta en 1781 por Pierre Méchain, colega de Charles Messier, pocos días después de haber localizado M95 y M96. Curiosamente, M105 no fue incluida originalmente en el catálogo de Messier. Fue añadida en 1947, cuando la astrónoma Helen S. Hogg encontró una carta escrita por Méchain en la que describía esta galaxia.\n"
-        "El telescopio espacial Hubble observó el núcleo de M105 y midió el movimiento de las estrellas que giran alrededor de su centro. Estas observaciones confirmaron la presencia de un agujero negro supermasivo en el corazón de la galaxia. Según estimaciones recientes, este agujero negro podría tener una masa hasta 200 millones de veces mayor que la del Sol. Información y figura tomadas de https://science.nasa.gov/mission/hubble/science/explore-the-night-sky/hubble-messier-catalog/messier-105/"
-    ),
-    "NGC_4485.txt": (
-        "La galaxia irregular NGC 4485 muestra claras señales de haber estado involucrada en una especie de “choque y fuga” cósmico con otra galaxia que pasó muy cerca. Pero en lugar de destruirla, este encuentro fortuito ha dado lugar al nacimiento de una nueva generación de estrellas, y posiblemente, también de planetas.\n"
-        "En el lado derecho de la galaxia se observa una intensa actividad de formación estelar, visible en la abundancia de estrellas jóvenes azules y nebulosas rosadas donde se están gestando nuevas estrellas. En contraste, el lado izquierdo parece más intacto, conservando algunos indicios de lo que alguna vez fue una estructura espiral, que entonces evolucionaba de manera más tranquila.\n"
-        "La responsable de este encuentro es la galaxia más grande NGC 4490, que no aparece en la imagen, ubicada fuera del encuadre, en la parte inferior. Estas dos galaxias rozaron sus bordes hace millones de años y actualmente están separadas por unos 24,000 años luz. La interacción gravitacional entre ambas creó ondas de gas y polvo más densas, lo que disparó la intensa formación de estrellas en ambas galaxias.\n"
-        "NGC 4485 es un ejemplo cercano del tipo de colisiones cósmicas que eran mucho más comunes hace miles de millones de años, cuando el universo era más pequeño y las galaxias estaban mucho más juntas.\n"
-        "Esta galaxia se encuentra a unos 25 millones de años luz, en la constelación boreal de Canes Venatici (Los Perros de Caza). Información y figura tomadas de https://science.nasa.gov/asset/hubble/ngc-4485/"
-    ),
-    # Agrega aquí más descripciones según tus galaxias
-}
-
 # Mostrar descripción e imagen si existe una galaxia seleccionada
 if galaxia:
     col_desc, col_img = st.columns([2, 1])  # 2:1 para que el texto sea más ancho que la imagen
-    descripcion = descripciones_galaxias.get(galaxia, "Sin descripción disponible para esta galaxia.")
+    info_galaxia = get_galaxy(galaxia) or {}
+    descripcion = info_galaxia.get("descripcion") or "Sin descripción disponible para esta galaxia."
     with col_desc:
         st.markdown(f"**Descripción:** {descripcion}")
-    # Buscar imagen en .png o .jpg
-    imagen_path = os.path.join(DATA_DIR, galaxia.replace('.txt', '.png'))
-    if not os.path.exists(imagen_path):
-        imagen_path = os.path.join(DATA_DIR, galaxia.replace('.txt', '.jpg'))
-    if not os.path.exists(imagen_path):
-        imagen_path = os.path.join(DATA_DIR, galaxia.replace('.txt', '.jpeg'))
+    imagen_path = info_galaxia.get("imagen")
     with col_img:
-        if os.path.exists(imagen_path):
-            st.image(imagen_path, caption=f"Imagen de {galaxia}", use_container_width=True)
+        if imagen_path:
+            st.image(get_preview(imagen_path, ANCHO_IMAGEN), caption=f"Imagen de {galaxia}", use_container_width=True)
         else:
             st.info("No hay imagen disponible para esta galaxia.")
 
@@ -123,29 +89,36 @@ if galaxia:
 st.subheader("🎼 Selecciona el tipo de galaxia para la sonificación:")
 tipo_galaxia = st.radio("", ("Espiral", "Elíptica"), key="tipo_galaxia_radio")
 
+fuente = None
 if uploaded_file is not None:
-    # Guardar el archivo subido temporalmente
-    temp_path = os.path.join(DATA_DIR, "espectro_usuario.txt")
-    with open(temp_path, "wb") as f:
-        f.write(uploaded_file.read())
-    file_path = temp_path
-    galaxia = "espectro_usuario.txt"
+    # El archivo subido se valida y se lee en memoria, sin escribirlo a disco.
+    # getbuffer() no copia: en cada rerun solo se calcula el hash y el espectro sale de la caché
+    try:
+        fuente = parse_spectrum_bytes(uploaded_file.getbuffer())
+    except InvalidSpectrumError as e:
+        st.error(f"❌ El archivo subido no es válido: {e}")
+        st.stop()
+    galaxia = uploaded_file.name
     nombre_base = os.path.splitext(uploaded_file.name)[0]  # Usar nombre real del archivo subido
 elif galaxia:
-    file_path = os.path.join(DATA_DIR, galaxia)
+    ruta_galaxia = os.path.join(DATA_DIR, galaxia)
+    fuente = cargar_espectro_archivo(ruta_galaxia, os.stat(ruta_galaxia).st_mtime_ns)
     nombre_base = os.path.splitext(galaxia)[0]  # Usar nombre de la galaxia
 
-if galaxia and file_path:
-    data = cargar_datos(file_path)
+if galaxia and fuente is not None:
+    data = cargar_espectro(fuente)
 
-    if data is not None:
+    if data is not None and detectar_region_plana(data) is None:
+        # Sin región plana no hay intensidad media de referencia: ni la gráfica ni el audio
+        st.error("No se encontró una región plana válida en este espectro, así que no se puede graficar ni sonificar.")
+    elif data is not None:
         # Paso 3: Generar MIDI (move this block up if needed)
         # Elimina o comenta esta línea:
         # st.subheader("🎼 Generar sonido")
         # Ahora el slider es el título principal:
         st.subheader("🎼 Rango de longitudes de onda a sonificar")
-        min_wavelength = float(data.iloc[:, 0].min())
-        max_wavelength = float(data.iloc[:, 0].max())
+        min_wavelength = data.min_wavelength
+        max_wavelength = data.max_wavelength
         rango_onda = st.slider(
             "",
             min_value=min_wavelength,
@@ -170,31 +143,23 @@ if galaxia and file_path:
             st.subheader("🔭 Visualización de datos")
             num_octavas = st.slider("Número de octavas", 1, 7, 5, key="num_octavas_slider")
             st.info("🎧 Consejo: Para una mejor identificación de las líneas espectrales se recomienda utilizar entre 5 y 7 octavas.")
-            # Define scale options and selection BEFORE plotting
-            scale_options = {
-                "Armónica Menor": [0, 2, 3, 5, 7, 8, 11],
-                "Pentatónica Menor": [0, 3, 5, 7, 10],
-                "Mayor": [0, 2, 4, 5, 7, 9, 11],
-                "Menor Natural": [0, 2, 3, 5, 7, 8, 10],
-                "Cromática": list(range(12))
-            }
-            selected_scale_name = st.selectbox("Selecciona una escala musical", list(scale_options.keys()))
-            notas_escala = scale_options.get(selected_scale_name, scale_options["Armónica Menor"])
-            
-            # Ensure notas_escala is always a list
-            if not isinstance(notas_escala, list):
-                notas_escala = scale_options["Armónica Menor"] # Default to Armónica Menor
+            # Escala elegida antes de graficar; las de 24 divisiones son microtonales (cuartos de tono)
+            nombres_escalas = list(SCALES.keys())
+            selected_scale_name = st.selectbox("Selecciona una escala musical", nombres_escalas,
+                                               index=nombres_escalas.index(DEFAULT_SCALE))
+            notas_escala, divisiones = SCALES[selected_scale_name]
 
             fig = graficar_galaxia_plotly(
-                archivo=file_path,
+                archivo=fuente,
                 tipo_galaxia=tipo_galaxia,
                 rango_onda=rango_onda,
                 nombre_archivo=nombre_base,
                 num_octavas=num_octavas,
-                notas_escala=notas_escala
+                notas_escala=notas_escala,
+                divisiones=divisiones
             )
-            min_intensity = float(data.iloc[:, 1].min())
-            max_intensity = float(data.iloc[:, 1].max())
+            min_intensity = data.min_intensity
+            max_intensity = data.max_intensity
             num_notes_range = (24, 24 + (num_octavas * 12))
 
             # Paleta de colores cíclica para las notas
@@ -204,8 +169,8 @@ if galaxia and file_path:
 
             # Graficar la curva general encima (opcional)
             fig.add_trace(go.Scatter(
-                x=data.iloc[:, 0],
-                y=data.iloc[:, 1],
+                x=data.wavelengths,
+                y=data.intensities,
                 mode='lines',
                 line=dict(color='gray', width=1),
                 name=galaxia,
@@ -247,12 +212,13 @@ if galaxia and file_path:
                 )
             )
             fig = graficar_galaxia_plotly(
-                archivo=file_path,
+                archivo=fuente,
                 tipo_galaxia=tipo_galaxia,
                 rango_onda=rango_onda,
                 nombre_archivo=nombre_base,
                 num_octavas=num_octavas,
-                notas_escala=notas_escala
+                notas_escala=notas_escala,
+                divisiones=divisiones
             )
             st.plotly_chart(fig)
 
@@ -271,6 +237,14 @@ if galaxia and file_path:
                 index=2
             )
             duracion_nota = figura[1]
+            limitar_duracion = st.checkbox(
+                "Limitar la duración del audio",
+                value=False,
+                help="Reduce las notas conservando las líneas espectrales para que el audio no supere la duración elegida."
+            )
+            duracion_objetivo = None
+            if limitar_duracion:
+                duracion_objetivo = st.slider("Duración máxima (s)", min_value=10, max_value=600, value=60, step=10)
             instrumentos_midi = {
                 "Piano acústico": 0,
                 "Guitarra acústica": 24,
@@ -291,6 +265,17 @@ if galaxia and file_path:
                 list(instrumentos_midi.keys()),
                 index=1
             )
+            expresivo = st.checkbox(
+                "Dinámica expresiva (volumen y articulación según el flujo)",
+                value=True,
+                help="Las líneas más profundas suenan más fuerte y las notas iguales consecutivas se sostienen."
+            )
+            pitch_bend = st.checkbox("Pitch bend según la pendiente del espectro", value=False)
+            solo_lineas = st.checkbox(
+                "Sonificar solo las líneas detectadas",
+                value=False,
+                help="Salta el continuo y sonifica únicamente las ventanas de las líneas identificadas (Hα, Hβ, [OIII], ...)."
+            )
             # Botón grande y más alto
             st.markdown(
                 """
@@ -317,34 +302,44 @@ if galaxia and file_path:
                 salida_wav_absorcion = f"{nombre_base}_absorcion.wav"
                 salida_wav_completo = f"{nombre_base}_completo.wav"
 
-                salida_midi_emision_path, salida_midi_absorcion_path, salida_midi_completo_path = sonificar_galaxia(
-                    archivo=file_path,
-                    rango_onda=rango_onda,
-                    tipo_galaxia=tipo_galaxia,
-                    num_octavas=num_octavas,
-                    tempo=tempo,
-                    duracion_nota=duracion_nota,
-                    instrumento_emision=instrumentos_midi[instrumento_emision],
-                    instrumento_absorcion=instrumentos_midi[instrumento_absorcion],
-                    notas_escala=notas_escala
-                )
-                # Convertir los MIDIs a WAV para previsualización
-                try:
-                    convert_midi_to_wav(salida_midi_emision_path, salida_wav_emision, SOUNDFONT_PATH)
-                except Exception as e:
-                    st.warning(f"No se pudo convertir {salida_midi_emision_path} a WAV: {e}")
-                try:
-                    convert_midi_to_wav(salida_midi_absorcion_path, salida_wav_absorcion, SOUNDFONT_PATH)
-                except Exception as e:
-                    st.warning(f"No se pudo convertir {salida_midi_absorcion_path} a WAV: {e}")
                 try:
-                    convert_midi_to_wav(salida_midi_completo_path, salida_wav_completo, SOUNDFONT_PATH)
-                except Exception as e:
-                    st.warning(f"No se pudo convertir {salida_midi_completo_path} a WAV: {e}")
+                    salida_midi_emision_path, salida_midi_absorcion_path, salida_midi_completo_path = sonificar_galaxia(
+                        archivo=fuente,
+                        nombre_archivo=nombre_base,
+                        rango_onda=rango_onda,
+                        tipo_galaxia=tipo_galaxia,
+                        num_octavas=num_octavas,
+                        tempo=tempo,
+                        duracion_nota=duracion_nota,
+                        instrumento_emision=instrumentos_midi[instrumento_emision],
+                        instrumento_absorcion=instrumentos_midi[instrumento_absorcion],
+                        notas_escala=notas_escala,
+                        divisiones=divisiones,
+                        expresivo=expresivo,
+                        pitch_bend=pitch_bend,
+                        solo_lineas=solo_lineas,
+                        duracion_objetivo=duracion_objetivo
+                    )
+                except ValueError as e:
+                    st.error(f"No se pudo sonificar: {e}")
+                else:
+                    # Convertir los MIDIs a WAV para previsualización
+                    try:
+                        convert_midi_to_wav(salida_midi_emision_path, salida_wav_emision, SOUNDFONT_PATH)
+                    except Exception as e:
+                        st.warning(f"No se pudo convertir {salida_midi_emision_path} a WAV: {e}")
+                    try:
+                        convert_midi_to_wav(salida_midi_absorcion_path, salida_wav_absorcion, SOUNDFONT_PATH)
+                    except Exception as e:
+                        st.warning(f"No se pudo convertir {salida_midi_absorcion_path} a WAV: {e}")
+                    try:
+                        convert_midi_to_wav(salida_midi_completo_path, salida_wav_completo, SOUNDFONT_PATH)
+                    except Exception as e:
+                        st.warning(f"No se pudo convertir {salida_midi_completo_path} a WAV: {e}")
 
-                st.success("✅ Archivos MIDI generados correctamente.")
-                st.session_state["midi_generado"] = True
-                st.session_state["wav_generado"] = True
+                    st.success("✅ Archivos MIDI generados correctamente.")
+                    st.session_state["midi_generado"] = True
+                    st.session_state["wav_generado"] = True
 
         # Opciones de descarga horizontales
         if st.session_state["midi_generado"]:
@@ -378,4 +373,46 @@ if galaxia and file_path:
                         if os.path.exists(archivo):
                             with open(archivo, "rb") as f:
                                 st.download_button(label, f, file_name=archivo, key=f"{archivo}_descarga1")
-        
\ No newline at end of file
+        
+
+
+# Comparación de varias galaxias alineadas en el marco en reposo
+with st.expander("🌠 Comparar galaxias en el marco en reposo"):
+    st.markdown(
+        "Los espectros se corrigen por redshift (z del catálogo o del encabezado del archivo) "
+        "y se remuestrean sobre una misma malla de longitudes de onda para comparar las mismas líneas."
+    )
+    todas_galaxias = search_galaxies("")
+    seleccion = st.multiselect(
+        "Galaxias a comparar",
+        todas_galaxias,
+        default=todas_galaxias[:2]
+    )
+    paso_malla = st.select_slider("Resolución de la malla (Å)", options=[1.0, 2.0, 5.0, 10.0], value=2.0)
+    if seleccion:
+        # Nombre y espectro se agregan juntos: si una galaxia no está en el catálogo se omiten los dos
+        nombres, espectros = [], []
+        for nombre in seleccion:
+            info = get_galaxy(nombre)
+            if info is None:
+                continue
+            espectro = cargar_espectro_archivo(info["ruta"], info["mtime_ns"])
+            nombres.append(nombre)
+            espectros.append((espectro.wavelengths, espectro.intensities, info["redshift"] or 0.0))
+        malla, flujos = resample_batch(espectros, grid=(3600.0, 7200.0, paso_malla))
+        fig_comparacion = go.Figure()
+        for nombre, flujo, (_, _, z) in zip(nombres, flujos, espectros):
+            fig_comparacion.add_trace(go.Scatter(x=malla, y=flujo, mode="lines", line=dict(width=1),
+                                                 name=f"{nombre} (z={z:g})"))
+        for nombre_linea, (lambda_reposo, _) in KNOWN_LINES.items():
+            fig_comparacion.add_vline(x=lambda_reposo, line_dash="dot", line_color="gray", line_width=1,
+                                      annotation_text=nombre_linea, annotation_position="top",
+                                      annotation_font_color="gray")
+        fig_comparacion.update_layout(
+            xaxis_title="Longitud de onda en reposo (Å)",
+            yaxis_title="Flujo normalizado",
+            plot_bgcolor="white",
+            paper_bgcolor="white",
+            height=500
+        )
+        st.plotly_chart(fig_comparacion)
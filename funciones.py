@@ -1,66 +1,70 @@
 import numpy as np
-import pandas as pd
-from midiutil import MIDIFile
-from scipy.ndimage import uniform_filter1d
 import os
-from midi2audio import FluidSynth
 import subprocess
-from pydub import AudioSegment
-import matplotlib.pyplot as plt
-import os
-from src.data_loader import load_galaxy_data
-import music21 as m21
+from src.sound_mapper import map_expression
+from src.line_detector import detect_lines, line_window_mask
+from src.downsampling import feature_preserving_decimation
+from src.ingest import HEADER_LINES, sniff_header
+from src.rest_frame import parse_header_redshift
+from src.spectrum import Spectrum, as_spectrum
+from src.scales import NOTE_NAMES, compile_scale, pitch_name, resolve_scale
+
+# pandas, scipy, midiutil, midi2audio y pydub se importan dentro de cada función:
+# cargarlos al importar este módulo hacía lento el primer arranque de la app.
 
 def cargar_datos(archivo):
-        # Cargar datos
-    with open(archivo, 'r') as f:
-        primera_linea = f.readline().strip()
-    # Detectar si hay encabezado
-    try:
-        [float(x) for x in primera_linea.split()]
-        skip = 0  # No es encabezado
-    except ValueError:
-        skip = 1  # Es encabezado
-    # Intentar leer con diferentes separadores
-    try:
-        datos = pd.read_csv(archivo, sep=r"\s+", comment='#', header=None, skiprows=skip, dtype={0: float, 1: float})
-    except:
-        datos = pd.read_csv(archivo, sep=';', comment='#', header=None, skiprows=skip, dtype={0: float, 1: float})
+    import pandas as pd
+
+    # Un espectro ya leído (por ejemplo, un archivo subido) se usa tal cual
+    if isinstance(archivo, pd.DataFrame):
+        return archivo
+    if isinstance(archivo, Spectrum):
+        return archivo.to_dataframe()
+    # Detectar encabezado y separador saltando los comentarios (por ejemplo "# z = 0.0029")
+    with open(archivo, 'rb') as f:
+        inicio = f.read(4096)
+    skip, sep = sniff_header(inicio)
+    datos = pd.read_csv(archivo, sep=sep, comment='#', header=None, skiprows=skip, dtype={0: float, 1: float})
+    # Redshift declarado en el encabezado, si lo hay
+    datos.attrs["z"] = parse_header_redshift(inicio.decode("utf-8", errors="replace").splitlines()[:HEADER_LINES])
     return (datos)
 
+def cargar_espectro(archivo):
+    """
+    Carga el espectro como Spectrum (arreglos contiguos de solo lectura).
+    Acepta un Spectrum (se usa tal cual), un DataFrame o la ruta de un archivo.
+    """
+    if isinstance(archivo, str):
+        nombre = os.path.splitext(os.path.basename(archivo))[0]
+        return Spectrum.from_dataframe(cargar_datos(archivo), nombre=nombre)
+    return as_spectrum(archivo)
+
 def detectar_region_plana(archivo, ventana=100, suavizado=10, rango_central=(0.95, 1.05)):
-    
-    # Cargar datos
-    datos = cargar_datos(archivo)
-    
-    longitudes_onda = datos.iloc[:, 0].values
-    intensidades = datos.iloc[:, 1].values
-    
-    # Aplicar suavizado si es necesario
-    if suavizado > 1:
-        intensidades_suavizadas = uniform_filter1d(intensidades, size=suavizado)
-    else:
-        intensidades_suavizadas = intensities
-    
-    # Calcular la media y desviación estándar en ventanas móviles
-    medias = np.array([np.mean(intensidades_suavizadas[i:i+ventana]) for i in range(len(intensidades_suavizadas) - ventana)])
-    stds = np.array([np.std(intensidades_suavizadas[i:i+ventana]) for i in range(len(intensidades_suavizadas) - ventana)])
-    
-    # Filtrar regiones que estén dentro del rango dado
-    indices_planos = np.where((medias >= rango_central[0]) & (medias <= rango_central[1]) & (stds < np.median(stds) * 0.5))[0]
-    
-    if len(indices_planos) == 0:
+    # El cálculo (vectorizado) y su resultado quedan en el Spectrum
+    region = cargar_espectro(archivo).flat_region(ventana, suavizado, rango_central)
+    if region is None:
         print("No se encontró una región plana con los criterios dados.")
-        return None
-    
-    # Seleccionar la primera región plana detectada
-    idx_mejor_region = indices_planos[0]
-    mejor_media = medias[idx_mejor_region]
-    mejor_std = stds[idx_mejor_region]
-    region_x = longitudes_onda[idx_mejor_region:idx_mejor_region+ventana]
-    region_y = intensidades[idx_mejor_region:idx_mejor_region+ventana]
-    
-    return mejor_media, mejor_std
+    return region
+
+
+def detectar_lineas(archivo, min_significancia=5.0, z=None):
+    """
+    Índice de líneas espectrales (emisión y absorción) del espectro completo.
+    Sin z se usa el redshift del espectro (el del encabezado), o 0.
+    El resultado queda en caché por espectro.
+    """
+    espectro = cargar_espectro(archivo)
+    if z is None:
+        z = espectro.z or 0.0
+    return detect_lines(espectro, min_significancia=min_significancia, z=z)
+
+
+def nota_minima(instrumento_emision=0, instrumento_absorcion=24):
+    # Instrumentos con registro más agudo (ej. Flauta, Violín) pueden necesitar un C4 (MIDI 48)
+    # Otros instrumentos pueden comenzar en C3 (MIDI 36)
+    if instrumento_emision in [73, 40] or instrumento_absorcion in [73, 40]: # 73 es Flauta, 40 es Violín
+        return 48 # C4
+    return 36 # C3
 
 
 def sonificar_galaxia(
@@ -78,26 +82,57 @@ def sonificar_galaxia(
     instrumento_emision=0,
     instrumento_absorcion=24,
     nombre_archivo=None,
-    escala="pentatonica_am",  # <-- Nuevo parámetro
+    escala=None,  # nombre de una escala de src.scales.SCALES (si no se pasan notas_escala)
     num_octavas=5, # Nueva variable
-    notas_escala=None
+    notas_escala=None,
+    divisiones=12,  # divisiones de la octava en las que se cuentan notas_escala (24 = cuartos de tono)
+    expresivo=True,
+    pitch_bend=False,
+    solo_lineas=False,
+    duracion_objetivo=None
 ):
+    from midiutil import MIDIFile
+
     # Cargar datos
-    datos = cargar_datos(archivo)
-    todas_wavelengths = datos.iloc[:, 0].values
-    todas_intensities = datos.iloc[:, 1].values
-    mask = (datos.iloc[:, 0] >= rango_onda[0]) & (datos.iloc[:, 0] <= rango_onda[1])
-    wavelengths = datos.iloc[:, 0][mask].values
-    intensities = datos.iloc[:, 1][mask].values
-    mean_intensity, std_intensity = detectar_region_plana(archivo, ventana, suavizado, rango_central)
-
-    if mean_intensity is None or std_intensity is None:
-        print("No se puede continuar con la sonificación sin una región plana válida.")
-        return
-
-    min_intensity = np.min(todas_intensities)
-    max_intensity = np.max(todas_intensities)
-    archivo_nombre = os.path.splitext(os.path.basename(archivo))[0]
+    espectro = cargar_espectro(archivo)
+    seleccion = espectro.select(rango_onda)
+    wavelengths = seleccion.wavelengths
+    intensities = seleccion.intensities
+    if solo_lineas:
+        # Sonificar solo las ventanas de las líneas identificadas en lugar de todo el continuo
+        lineas = detectar_lineas(espectro)
+        en_lineas = line_window_mask(wavelengths, lineas)
+        wavelengths = wavelengths[en_lineas]
+        intensities = intensities[en_lineas]
+    if duracion_objetivo is not None:
+        # Presupuesto de notas para no pasar de duracion_objetivo segundos a este tempo
+        max_notas = int(duracion_objetivo * tempo / 60 / duracion_nota)
+        if max_notas < 1:
+            raise ValueError(
+                f"Una duración de {duracion_objetivo} s no alcanza para una nota de {duracion_nota} tiempos a {tempo} BPM."
+            )
+        if len(intensities) > max_notas:
+            lineas = detectar_lineas(espectro)
+            lineas = lineas.sort_values("significancia", ascending=False)
+            # Los extremos de las líneas (de la más a la menos significativa) se conservan siempre
+            picos = lineas["longitud_onda"].to_numpy()
+            posiciones = np.searchsorted(wavelengths, picos)
+            # Solo los picos que quedaron dentro de la selección actual
+            dentro = posiciones < len(wavelengths)
+            dentro[dentro] = wavelengths[posiciones[dentro]] == picos[dentro]
+            extremos = posiciones[dentro]
+            conservadas = feature_preserving_decimation(intensities, max_notas, conservar=extremos)
+            wavelengths = wavelengths[conservadas]
+            intensities = intensities[conservadas]
+    region = detectar_region_plana(espectro, ventana, suavizado, rango_central)
+
+    if region is None:
+        raise ValueError("No se encontró una región plana válida en el espectro: no se puede sonificar.")
+    mean_intensity, std_intensity = region
+
+    min_intensity = espectro.min_intensity
+    max_intensity = espectro.max_intensity
+    archivo_nombre = nombre_archivo or espectro.nombre or "espectro"
 
     # Definir nombres de salida personalizados si no se pasan explícitamente
     output_dir = "output"
@@ -111,33 +146,14 @@ def sonificar_galaxia(
         salida_midi_completo = os.path.join(output_dir, f"{archivo_nombre}.mid")
 
 
-    # Definir la escala pentatónica con nombres de notas
-    # Definir las escalas
-    escalas = {
-        "pentatonica_am": [("A", 69), ("C", 72), ("D", 74), ("E", 76), ("G", 79)],
-        "armonica_am": [("A", 69), ("B", 71), ("C", 72), ("D", 74), ("E", 76), ("F", 77), ("G#", 80)],
-        "mayor_a": [("A", 69), ("B", 71), ("C#", 73), ("D", 74), ("E", 76), ("F#", 78), ("G#", 80)],
-        "menor_a": [("A", 69), ("B", 71), ("C", 72), ("D", 74), ("E", 76), ("F", 77), ("G", 79)]
-    }
-    pentatonic_scale = escalas.get(escala, escalas["pentatonica_am"])
-    
-    # Ajustar el rango de octavas basado en num_octavas
     # Ajustar el rango de octavas basado en num_octavas y el instrumento
-    # Instrumentos con registro más agudo (ej. Flauta, Violín) pueden necesitar un C4 (MIDI 48)
-    # Otros instrumentos pueden comenzar en C3 (MIDI 36)
-    if instrumento_emision in [73, 40] or instrumento_absorcion in [73, 40]: # 73 es Flauta, 40 es Violín
-        min_midi_note = 48 # C4
-    else:
-        min_midi_note = 36 # C3
-    max_midi_note = min_midi_note + (num_octavas * 12) - 1
-    
-    notas_cromaticas_base = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
-    full_chromatic_scale = []
-    for midi_val in range(min_midi_note, max_midi_note + 1):
-        octave_num = (midi_val // 12) - 1 # MIDI octave number
-        note_name_idx = midi_val % 12
-        full_chromatic_scale.append((notas_cromaticas_base[note_name_idx] + str(octave_num), midi_val))
-    num_notes = len(full_chromatic_scale)
+    min_midi_note = nota_minima(instrumento_emision, instrumento_absorcion)
+
+    # Escala seleccionada por el usuario, compilada (y guardada en caché) en tablas de consulta
+    # sobre los num_octavas * divisiones pasos que empiezan en min_midi_note
+    intervalos, divisiones = resolve_scale(notas_escala, divisiones, escala)
+    tabla = compile_scale(intervalos, divisiones, min_midi_note, num_octavas)
+    num_notes = tabla.num_pasos
 
     # Aquí el step_size depende del tipo de galaxia
     if tipo_galaxia.lower() == "espiral":
@@ -159,46 +175,46 @@ def sonificar_galaxia(
     midi_absorcion.addProgramChange(0, 0, 0, instrumento_absorcion)
     midi_completo.addProgramChange(0, 0, 0, instrumento_emision)      # Canal 0: emisión
     midi_completo.addProgramChange(1, 1, 0, instrumento_absorcion)    # Canal 1: absorción
-    puntos_sonificados = []
-    # Escala seleccionada por el usuario
-    # notas_escala contains the intervals (0-11) for the selected scale
-    notas_escala_set = set(notas_escala)
-
-    # Aquí filtras o coloreas según la escala seleccionada por el usuario
-    for i, intensity in enumerate(intensities):
-        index = int((intensity - min_intensity) / step_size)
-        index = max(0, min(index, num_notes - 1)) # Usar num_notes de la escala cromática
-        note_name_full, note = full_chromatic_scale[index]
-        # Find the nearest note in the selected scale
-        final_note = note
-        if (note % 12) not in notas_escala_set:
-            # Search for the nearest note in the scale, both upwards and downwards
-            found_nearest = False
-            for j in range(1, max(num_notes, 12)): # Search up to an octave or full range
-                # Check upwards
-                if note + j <= max_midi_note and ((note + j) % 12) in notas_escala_set:
-                    final_note = note + j
-                    found_nearest = True
-                    break
-                # Check downwards
-                if note - j >= min_midi_note and ((note - j) % 12) in notas_escala_set:
-                    final_note = note - j
-                    found_nearest = True
-                    break
-            if not found_nearest:
-                # If no nearest note found within reasonable range, default to original note
-                # or handle as an error/skip, for now, we'll use the original note
-                final_note = note
-        tiempo = i * duracion_nota
-        if intensity >= mean_intensity: # Emisión
-            midi_emision.addNote(0, 0, final_note, tiempo, duracion_nota, 100)
-            midi_completo.addNote(0, 0, final_note, tiempo, duracion_nota, 100)
-            midi_absorcion.addNote(0, 0, 0, tiempo, duracion_nota, 0)
+    # Paso de la malla de cada muestra según su intensidad; la nota (y su desviación
+    # microtonal) de la escala sale de las tablas compiladas
+    pasos = np.clip(((intensities - min_intensity) / step_size).astype(int), 0, num_notes - 1)
+    notas = tabla.notas[pasos]
+
+    # Velocidad, duración y pitch bend de todas las notas en un solo paso;
+    # las notas iguales consecutivas se fusionan en una nota sostenida
+    expresion = map_expression(
+        intensities, notas, mean_intensity, duracion_nota,
+        dinamica=expresivo, fusionar=expresivo, pitch_bend=pitch_bend, afinacion=tabla.bends[pasos]
+    )
+    # Valor de la rueda de pitch bend por semitono (rango estándar de ±2 semitonos)
+    bend_por_semitono = 8192 / 2
+    ultimo_bend = {0: 0, 1: 0}
+    for tiempo, duracion, nota, velocidad, bend, es_emision in zip(
+        expresion["tiempo"], expresion["duracion"], expresion["nota"],
+        expresion["velocidad"], expresion["bend"], expresion["emision"]
+    ):
+        tiempo, duracion, nota, velocidad = float(tiempo), float(duracion), int(nota), int(velocidad)
+        canal = 0 if es_emision else 1
+        # El bend incluye la afinación de la escala (microtonal) y el bend expresivo
+        valor = int(max(-8192, min(8191, round(bend * bend_por_semitono))))
+        if valor != ultimo_bend[canal]:
+            if es_emision:
+                midi_emision.addPitchWheelEvent(0, 0, tiempo, valor)
+            else:
+                midi_absorcion.addPitchWheelEvent(0, 0, tiempo, valor)
+            midi_completo.addPitchWheelEvent(canal, canal, tiempo, valor)
+            ultimo_bend[canal] = valor
+        if es_emision: # Emisión
+            midi_emision.addNote(0, 0, nota, tiempo, duracion, velocidad)
         else:  # Absorción
-            midi_absorcion.addNote(0, 0, final_note, tiempo, duracion_nota, 100)
-            midi_completo.addNote(1, 1, final_note, tiempo, duracion_nota, 100)
-            midi_emision.addNote(0, 0, 0, tiempo, duracion_nota, 0)
-            puntos_sonificados.append((wavelengths[i], intensity))
+            midi_absorcion.addNote(0, 0, nota, tiempo, duracion, velocidad)
+        midi_completo.addNote(canal, canal, nota, tiempo, duracion, velocidad)
+
+    # Nota silenciosa al final para que emisión y absorción duren lo mismo
+    if len(intensities) > 0:
+        fin = (len(intensities) - 1) * duracion_nota
+        midi_emision.addNote(0, 0, 0, fin, duracion_nota, 0)
+        midi_absorcion.addNote(0, 0, 0, fin, duracion_nota, 0)
 
     # Guardar los archivos MIDI
     with open(salida_midi_emision, "wb") as f:
@@ -214,13 +230,8 @@ def sonificar_galaxia(
     return salida_midi_emision, salida_midi_absorcion, salida_midi_completo
 
 def tipo(archivo, rango_onda=(3800, 4200)): 
-    # Cargar datos
-    datos = pd.read_csv(archivo, sep=';')
-    
-    # Filtrar datos dentro del rango de longitud de onda
-    mask = (datos.iloc[:, 0] >= rango_onda[0]) & (datos.iloc[:, 0] <= rango_onda[1])
-    wavelengths = datos.iloc[:, 0][mask].values
-    intensities = datos.iloc[:, 1][mask].values
+    # Cargar datos y filtrar dentro del rango de longitud de onda
+    intensities = cargar_espectro(archivo).select(rango_onda).intensities
 
     media = np.mean(intensities)
 
@@ -237,6 +248,8 @@ def tipo(archivo, rango_onda=(3800, 4200)):
 
 
 def convertir_midi_a_wav(nombre_midi, nombre_wav):
+    from midi2audio import FluidSynth
+
     sf2 = "default.sf2"  # soundfont (asegúrate de tenerlo)
     FluidSynth(sound_font=sf2).midi_to_audio(nombre_midi, nombre_wav)
     
@@ -250,6 +263,8 @@ def convertir_midi_a_wav_musescore(midi_file, wav_file, musescore_path="C:/Progr
     subprocess.run([musescore_path, midi_file, "-o", wav_file], check=True)
     
 def mezclar_wavs(wav1, wav2, salida="mezcla.wav"):
+    from pydub import AudioSegment
+
     audio1 = AudioSegment.from_wav(wav1)
     audio2 = AudioSegment.from_wav(wav2)
     mezcla = audio1.overlay(audio2)
@@ -263,46 +278,42 @@ def graficar_galaxia_plotly(
     ventana=100,
     suavizado=10,
     rango_central=(0.95, 1.05),
-    escala="pentatonica_am",
+    escala=None,
     cantidad_de_octavas=5,
     nombre_archivo=None,
     num_octavas=5,
-    notas_escala=None
+    notas_escala=None,
+    anotar_lineas=True,
+    divisiones=12,
+    instrumento_emision=0,
+    instrumento_absorcion=24
 ):
-    # Ensure notas_escala is a list, default to chromatic scale if None
-    if notas_escala is None:
-        notas_escala = list(range(12)) # Default to chromatic scale (0-11)
+    # Sin notas_escala ni escala se usa la escala cromática
+    intervalos, divisiones = resolve_scale(notas_escala, divisiones, escala)
     import plotly.graph_objects as go
     from plotly.subplots import make_subplots
 
     # Cargar datos
-    datos = cargar_datos(archivo)
-    todas_wavelengths = datos.iloc[:, 0].values
-    todas_intensities = datos.iloc[:, 1].values
-    mask = (datos.iloc[:, 0] >= rango_onda[0]) & (datos.iloc[:, 0] <= rango_onda[1])
-    wavelengths = datos.iloc[:, 0][mask].values
-    intensities = datos.iloc[:, 1][mask].values
-    mean_intensity, std_intensity = detectar_region_plana(archivo, ventana, suavizado, rango_central)
-
-    if mean_intensity is None or std_intensity is None:
-        print("No se puede graficar sin una región plana válida.")
-        return
-
-    min_intensity = np.min(todas_intensities)
-    max_intensity = np.max(todas_intensities)
-    archivo_nombre_base = os.path.splitext(os.path.basename(archivo))[0]
-
-    # Definir las escalas
-    escalas = {
-        "pentatonica_am": [("A", 69), ("C", 72), ("D", 74), ("E", 76), ("G", 79)],
-        "armonica_am": [("A", 69), ("B", 71), ("C", 72), ("D", 74), ("E", 76), ("F", 77), ("G#", 80)],
-        "mayor_a": [("A", 69), ("B", 71), ("C#", 73), ("D", 74), ("E", 76), ("F#", 78), ("G#", 80)],
-        "menor_a": [("A", 69), ("B", 71), ("C", 72), ("D", 74), ("E", 76), ("F", 77), ("G", 79)]
-    }
-    pentatonic_scale = escalas.get(escala, escalas["pentatonica_am"])
-    octavas = [-24, -12, 0, 12, 24, 36, 48]
-    full_scale = [(name, note + octave) for octave in octavas for name, note in pentatonic_scale]
-    num_notes = cantidad_de_octavas * 12
+    espectro = cargar_espectro(archivo)
+    todas_wavelengths = espectro.wavelengths
+    todas_intensities = espectro.intensities
+    seleccion = espectro.select(rango_onda)
+    wavelengths = seleccion.wavelengths
+    intensities = seleccion.intensities
+    region = detectar_region_plana(espectro, ventana, suavizado, rango_central)
+
+    if region is None:
+        raise ValueError("No se encontró una región plana válida en el espectro: no se puede graficar.")
+    mean_intensity, std_intensity = region
+
+    min_intensity = espectro.min_intensity
+    max_intensity = espectro.max_intensity
+    archivo_nombre_base = espectro.nombre or "espectro"
+
+    # Misma malla que sonificar_galaxia (misma nota mínima para los mismos instrumentos):
+    # una franja de intensidad por paso, y la escala compilada marca qué pasos le pertenecen
+    tabla = compile_scale(intervalos, divisiones, nota_minima(instrumento_emision, instrumento_absorcion), num_octavas)
+    num_notes = tabla.num_pasos
 
     # Definir el rango del eje Y según el tipo de galaxia
     if tipo_galaxia.lower() == "espiral":
@@ -324,20 +335,6 @@ def graficar_galaxia_plotly(
     else:
         step_size = (max_intensity - min_intensity) / num_notes  # por defecto
 
-    # Escala cromática completa (por ejemplo, C1-B6)
-    notas_cromaticas = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
-    full_chromatic_scale = []
-    for octava in range(num_octavas):
-        for i, name in enumerate(notas_cromaticas):
-            # MIDI notes for C4 (middle C) is 60. C1 is 36. C-2 is 0.
-            # We want to start from C2 (MIDI 48) for better audibility/visualization
-            full_chromatic_scale.append((name, 48 + (12 * octava) + i))
-    
-    # Filter full_chromatic_scale based on notas_escala (MIDI values)
-    # notas_escala contains the intervals (0-11) for the selected scale
-    # We need to check if the MIDI note's pitch class is in notas_escala
-    notas_escala_set = set(notas_escala)
-
     # Mapeo de colores para cada nota (similar a sonificar_galaxia)
     note_colors = {
         "C": "green",
@@ -414,27 +411,27 @@ def graficar_galaxia_plotly(
         showlegend=True
      ))
 
+    # Líneas espectrales identificadas
+    if anotar_lineas:
+        lineas = detectar_lineas(espectro)
+        for _, linea in lineas[lineas["linea"].notna()].iterrows():
+            fig.add_vline(x=linea["longitud_onda"], line_dash="dash", line_color="black", line_width=1,
+                          opacity=0.4, annotation_text=linea["linea"], annotation_position="top",
+                          annotation_font_color="black")
+
     # Líneas horizontales para las notas
-    min_midi_in_scale = min(n[1] for n in full_chromatic_scale)
-    max_midi_in_scale = max(n[1] for n in full_chromatic_scale)
-
-    for i, note_info in enumerate(full_chromatic_scale):
-        note_name_full = note_info[0]
-        note_midi = note_info[1]
-        note_base_name = ''.join([i for i in note_name_full if not i.isdigit()]) # Extract C, C#, D, etc.
-
-        # Calcular la posición Y de la línea mapeando las notas MIDI al rango de intensidad deseado
-        y_pos = y_range_min + (note_midi - min_midi_in_scale) * (y_range_max - y_range_min) / (max_midi_in_scale - min_midi_in_scale)
-
-        # Asignar color y nombre de la nota
-        color = note_colors.get(note_base_name, "lightgray") # Usar get para evitar KeyError
-        
-        # Solo graficar si la nota está en la escala seleccionada
-        # Check if the pitch class of the current note_midi is in notas_escala_set
-        if (note_midi % 12) in notas_escala_set:
-            fig.add_hline(y=y_pos, line_dash="dot", line_color=color, line_width=1,
-                          annotation_text=note_name_full, annotation_position="right",
-                          annotation_font_color=color)
+    # Solo se grafican las alturas que pertenecen a la escala seleccionada
+    for paso in np.flatnonzero(tabla.en_escala):
+        altura = tabla.malla[paso]
+        # La línea marca el inicio de la franja de intensidad que suena con esta altura
+        # (las franjas empiezan en la intensidad mínima, como en sonificar_galaxia)
+        y_pos = min_intensity + paso * step_size
+
+        # Asignar color (el de la nota temperada más cercana) y nombre de la nota
+        color = note_colors.get(NOTE_NAMES[int(np.floor(altura + 0.5)) % 12], "lightgray")
+        fig.add_hline(y=y_pos, line_dash="dot", line_color=color, line_width=1,
+                      annotation_text=pitch_name(altura, con_octava=False), annotation_position="right",
+                      annotation_font_color=color)
 
     fig.update_layout(
         title_text=f"Espectro Galáctico y Sonificación de {nombre_archivo if nombre_archivo else archivo_nombre_base}",
@@ -0,0 +1,74 @@
+# scripts/carga_api.py
+"""
+Prueba de carga local para la API de sonificación (src/api.py).
+
+Uso (con la API corriendo en otra terminal):
+
+    python scripts/carga_api.py --url http://127.0.0.1:8000 --clientes 16 --peticiones 400
+
+Reporta peticiones por segundo y latencias p50/p95 para cada endpoint.
+"""
+import argparse
+import json
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+def _peticion(url, metodo="GET", cuerpo=None, tipo="application/json"):
+    req = urllib.request.Request(url, data=cuerpo, method=metodo, headers={"Content-Type": tipo})
+    inicio = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=120) as r:
+            r.read()
+            status = r.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except OSError:
+        status = 0
+    return status, time.perf_counter() - inicio
+
+
+def medir(nombre, llamada, clientes, peticiones):
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clientes) as pool:
+        resultados = list(pool.map(lambda _: llamada(), range(peticiones)))
+    total = time.perf_counter() - inicio
+    latencias = np.array([t for _, t in resultados]) * 1000
+    errores = sum(1 for status, _ in resultados if not 200 <= status < 300)
+    ocupado = sum(1 for status, _ in resultados if status == 503)
+    print(
+        f"{nombre:<12} {peticiones / total:8.1f} req/s   "
+        f"p50 {np.percentile(latencias, 50):8.1f} ms   p95 {np.percentile(latencias, 95):8.1f} ms   "
+        f"errores {errores}/{peticiones} (503 ocupado: {ocupado})"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--clientes", type=int, default=16, help="clientes concurrentes")
+    parser.add_argument("--peticiones", type=int, default=400, help="peticiones por endpoint")
+    parser.add_argument("--espectro", default="data/NGC_1569.txt", help="archivo a subir")
+    args = parser.parse_args()
+
+    with open(args.espectro, "rb") as f:
+        contenido = f.read()
+    req = urllib.request.Request(f"{args.url}/espectros", data=contenido, method="POST")
+    with urllib.request.urlopen(req) as r:
+        espectro_id = json.load(r)["id"]
+
+    parametros = json.dumps({"tipo_galaxia": "Espiral", "rango_onda": [6400, 6700], "tempo": 200}).encode()
+    medir("subida", lambda: _peticion(f"{args.url}/espectros", "POST", contenido, "text/plain"),
+          args.clientes, args.peticiones)
+    medir("grafica", lambda: _peticion(f"{args.url}/espectros/{espectro_id}/grafica?puntos=1000"),
+          args.clientes, args.peticiones)
+    medir("sonificar", lambda: _peticion(f"{args.url}/espectros/{espectro_id}/sonificar", "POST", parametros),
+          args.clientes, args.peticiones)
+
+
+if __name__ == "__main__":
+    main()
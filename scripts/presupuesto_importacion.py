@@ -0,0 +1,89 @@
+# scripts/presupuesto_importacion.py
+"""
+Control del tiempo de arranque en frío: importa cada módulo en un intérprete
+nuevo con `python -X importtime` y falla (código de salida 1) si supera su
+presupuesto o si arrastra algún módulo pesado que debería cargarse al usarse.
+
+Uso, desde la raíz del proyecto:
+
+    python scripts/presupuesto_importacion.py
+    python scripts/presupuesto_importacion.py --factor 2   # máquinas lentas
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+# Presupuesto en milisegundos (tiempo acumulado del import, sin contar el intérprete)
+PRESUPUESTOS_MS = {
+    "funciones": 250,
+    "src.catalog": 250,
+    "src.ingest": 250,
+    "src.image_pipeline": 50,
+    "src.midi_generator": 50,
+    "src.sound_mapper": 50,
+    "src.line_detector": 250,
+    "src.data_loader": 50,
+    "src.spectrum": 250,
+}
+
+# Módulos que solo deben importarse al usarlos por primera vez
+PESADOS = ("matplotlib", "music21", "scipy", "pandas", "pydub", "midi2audio", "midiutil", "plotly", "PIL")
+
+REPETICIONES = 5
+
+
+def medir(modulo):
+    """
+    Retorna (tiempo acumulado en ms, módulos importados) para un import en frío.
+    """
+    salida = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        capture_output=True, text=True, check=True,
+    ).stderr
+    importados = set()
+    total_us = 0
+    for linea in salida.splitlines():
+        if not linea.startswith("import time:") or "|" not in linea:
+            continue
+        partes = linea.split("|")
+        try:
+            acumulado = int(partes[1])
+        except ValueError:
+            continue  # encabezado
+        nombre = partes[2].strip()
+        importados.add(nombre)
+        if nombre == modulo:
+            total_us = acumulado
+    return total_us / 1000, importados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--factor", type=float, default=1.0, help="multiplica todos los presupuestos")
+    args = parser.parse_args()
+
+    fallas = []
+    for modulo, presupuesto in PRESUPUESTOS_MS.items():
+        tiempos = []
+        for _ in range(REPETICIONES):
+            ms, importados = medir(modulo)
+            tiempos.append(ms)
+        # La mediana evita que una medición ruidosa haga fallar el control
+        mediana = statistics.median(tiempos)
+        limite = presupuesto * args.factor
+        arrastrados = sorted(p for p in PESADOS if p in importados)
+        estado = "OK" if mediana <= limite and not arrastrados else "FALLA"
+        print(f"{estado:<6}{modulo:<22}{mediana:8.1f} ms (presupuesto {limite:.0f} ms)")
+        if mediana > limite:
+            fallas.append(f"{modulo} tarda {mediana:.1f} ms en importarse (presupuesto {limite:.0f} ms)")
+        if arrastrados:
+            fallas.append(f"{modulo} importa al cargarse: {', '.join(arrastrados)}")
+
+    for falla in fallas:
+        print(f"- {falla}")
+    sys.exit(1 if fallas else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,494 @@
+# src/api.py
+"""
+API HTTP (ASGI) para sonificar espectros sin pasar por Streamlit.
+
+Ejecutar desde la raíz del proyecto con:
+
+    uvicorn src.api:app --host 0.0.0.0 --port 8000
+
+El cálculo (lectura de espectros, datos para graficar y sonificación) corre en
+un pool de procesos creado al arrancar, que mantiene los módulos pesados
+importados y sus cachés calientes entre peticiones. Los espectros se leen una
+sola vez y se publican en memoria compartida (src/shared_store.py): los workers
+los abren en solo lectura, sin copiarlos.
+"""
+import asyncio
+import hashlib
+import math
+import multiprocessing
+import os
+import shutil
+import signal
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import FileResponse, JSONResponse
+from starlette.routing import Route
+
+from src.catalog import get_galaxy, refresh_catalog, search_galaxies
+from src.ingest import MAX_UPLOAD_BYTES, InvalidSpectrumError
+from src.scales import resolve_scale
+from src.shared_store import SharedArrayStore, attach, prune_unlinked
+
+DATA_DIR = "data"
+OUTPUT_DIR = os.path.join("output", "api")
+SOUNDFONT_PATH = "GeneralUser-GS.sf2"
+
+NUM_WORKERS = int(os.environ.get("SONIFICACION_WORKERS", os.cpu_count() or 2))
+# Peticiones de cálculo en vuelo (en cola + ejecutándose); las demás reciben 503
+MAX_PENDING = int(os.environ.get("SONIFICACION_MAX_PENDIENTES", NUM_WORKERS * 4))
+# Tras tantas tareas cada worker se recicla, para acotar la memoria a largo plazo
+MAX_TASKS_PER_WORKER = 500
+MAX_UPLOADS = 64
+MAX_CATALOG_SPECTRA = 256
+MAX_JOBS = 200
+MAX_PLOT_POINTS = 5000
+MAX_OCTAVES = 7  # igual que el control de la app
+MAX_TARGET_DURATION = 600  # segundos, igual que el control de la app
+# Espectros ya armados en cada worker: conservan sus valores calculados (región plana, huella)
+MAX_WORKER_SPECTRA = 64
+
+
+# --- Código que corre dentro de los workers ---------------------------------
+
+_worker_spectra = OrderedDict()  # clave -> (archivos compartidos, (Spectrum, líneas)) (LRU, uno por worker)
+
+def _init_worker():
+    # Ctrl+C llega a todo el grupo de procesos: el que decide cómo cerrar el pool es el servidor
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    # Importar aquí los módulos pesados deja cada worker listo antes de la primera petición
+    import funciones  # noqa: F401
+    import scipy.ndimage  # noqa: F401
+    import scipy.signal  # noqa: F401
+    from src import midi_generator  # noqa: F401
+
+    # Leer el SoundFont una vez lo deja en la caché de páginas del sistema para FluidSynth
+    if os.path.exists(SOUNDFONT_PATH):
+        with open(SOUNDFONT_PATH, "rb") as f:
+            while f.read(1 << 24):
+                pass
+
+
+def _parse_job(tipo, valor):
+    """
+    Lee un espectro (bytes subidos o ruta del catálogo) y calcula una sola vez sus rasgos
+    (índice de líneas y región plana). Retorna (arreglos, atributos), que el proceso
+    principal publica en memoria compartida para todos los workers.
+    """
+    from funciones import detectar_lineas
+    from src.ingest import parse_spectrum_bytes
+    from src.line_detector import lines_to_array
+
+    if tipo == "bytes":
+        espectro = parse_spectrum_bytes(valor)
+    else:
+        # Misma lectura y validación que usa el catálogo al indexar el archivo
+        with open(valor, "rb") as f:
+            espectro = parse_spectrum_bytes(f.read(), max_bytes=None)
+    arreglos = {
+        "longitud_onda": espectro.wavelengths,
+        "flujo": espectro.intensities,
+        "lineas": lines_to_array(detectar_lineas(espectro)),
+    }
+    return arreglos, {"z": espectro.z, "region_plana": espectro.flat_region()}
+
+
+def _load_source(descriptor):
+    from src.line_detector import lines_from_array, prime_cache
+    from src.spectrum import Spectrum
+
+    # Las rutas incluyen la generación: si la clave se republicó, la entrada vieja se reemplaza
+    clave = descriptor["clave"]
+    rutas = tuple(sorted(descriptor["rutas"].values()))
+    entrada = _worker_spectra.get(clave)
+    if entrada is None or entrada[0] != rutas:
+        # Se sueltan los espectros cuyos archivos ya se borraron (y con ellos sus mapas)
+        prune_unlinked(_worker_spectra)
+        # Arreglos y rasgos se leen desde la memoria compartida, sin copiarlos ni recalcularlos
+        arreglos = attach(descriptor)
+        atributos = descriptor["atributos"]
+        espectro = Spectrum(arreglos["longitud_onda"], arreglos["flujo"], atributos.get("z"))
+        espectro.remember_flat_region(atributos["region_plana"])
+        entrada = (rutas, (espectro, lines_from_array(arreglos["lineas"], espectro.intensities)))
+        _worker_spectra[clave] = entrada
+    _worker_spectra.move_to_end(clave)
+    while len(_worker_spectra) > MAX_WORKER_SPECTRA:
+        _worker_spectra.popitem(last=False)
+    espectro, lineas = entrada[1]
+    # El índice compartido vuelve a la caché de detect_lines aunque su LRU lo haya soltado
+    prime_cache(lineas, espectro)
+    return espectro
+
+
+def _plot_job(descriptor, rango_onda, puntos):
+    from funciones import detectar_lineas
+    from src.downsampling import minmax_downsample
+
+    espectro = _load_source(descriptor)
+    seleccion = espectro.select(rango_onda) if rango_onda is not None else espectro
+    wavelengths, intensities = seleccion.wavelengths, seleccion.intensities
+    indices = minmax_downsample(intensities, puntos)
+    lineas = detectar_lineas(espectro)
+    lineas = lineas[lineas["linea"].notna()]
+    if rango_onda is not None:
+        lineas = lineas[(lineas["longitud_onda"] >= rango_onda[0]) & (lineas["longitud_onda"] <= rango_onda[1])]
+    return {
+        "n_muestras": len(wavelengths),
+        "longitud_onda": wavelengths[indices].tolist(),
+        "flujo": intensities[indices].tolist(),
+        "lineas": lineas[["linea", "longitud_onda", "tipo", "ancho", "significancia"]].to_dict(orient="records"),
+    }
+
+
+def _sonify_job(descriptor, nombre, parametros, job_dir, audio):
+    espectro = _load_source(descriptor)
+    os.makedirs(job_dir, exist_ok=True)
+    try:
+        return _write_artifacts(espectro, nombre, parametros, job_dir, audio)
+    except BaseException:
+        # Un trabajo fallido no deja una carpeta de artefactos huérfana
+        shutil.rmtree(job_dir, ignore_errors=True)
+        raise
+
+
+def _write_artifacts(espectro, nombre, parametros, job_dir, audio):
+    from funciones import sonificar_galaxia
+    from src.midi_generator import convert_midi_to_wav
+
+    salidas = {
+        "emision": os.path.join(job_dir, f"{nombre}_emision.mid"),
+        "absorcion": os.path.join(job_dir, f"{nombre}_absorcion.mid"),
+        "completo": os.path.join(job_dir, f"{nombre}_completo.mid"),
+    }
+    sonificar_galaxia(
+        archivo=espectro,
+        nombre_archivo=nombre,
+        salida_midi_emision=salidas["emision"],
+        salida_midi_absorcion=salidas["absorcion"],
+        salida_midi_completo=salidas["completo"],
+        **parametros,
+    )
+    avisos = []
+    if audio:
+        for midi_path in salidas.values():
+            try:
+                convert_midi_to_wav(midi_path, os.path.splitext(midi_path)[0] + ".wav", SOUNDFONT_PATH)
+            except Exception as e:
+                avisos.append(f"No se pudo convertir {os.path.basename(midi_path)} a WAV: {e}")
+    return {"artefactos": sorted(os.listdir(job_dir)), "avisos": avisos}
+
+
+# --- Servidor ---------------------------------------------------------------
+
+_pool = None
+_pending = None
+_store = None
+# Cada entrada mantiene una referencia en _store mientras esté en estas listas (LRU)
+_uploads = OrderedDict()  # hash del espectro subido -> resumen
+_catalog_spectra = OrderedDict()  # ruta -> clave publicada (ruta, mtime_ns)
+_jobs = OrderedDict()  # id de trabajo -> carpeta de artefactos
+
+
+class _Busy(Exception):
+    pass
+
+
+async def _run(funcion, *args):
+    """
+    Ejecuta funcion(*args) en el pool sin bloquear el loop de eventos.
+    Si ya hay MAX_PENDING tareas en vuelo, falla de inmediato en vez de encolar sin límite.
+    """
+    if _pending.locked():
+        raise _Busy()
+    async with _pending:
+        loop = asyncio.get_running_loop()
+        futuro = loop.create_future()
+
+        def _ok(valor):
+            loop.call_soon_threadsafe(lambda: futuro.done() or futuro.set_result(valor))
+
+        def _error(exc):
+            loop.call_soon_threadsafe(lambda: futuro.done() or futuro.set_exception(exc))
+
+        _pool.apply_async(funcion, args, callback=_ok, error_callback=_error)
+        return await futuro
+
+
+def _error(mensaje, status):
+    headers = {"Retry-After": "1"} if status == 503 else None
+    return JSONResponse({"error": mensaje}, status_code=status, headers=headers)
+
+
+def _summary(wavelengths):
+    return {
+        "n_muestras": len(wavelengths),
+        "lambda_min": float(wavelengths.min()),
+        "lambda_max": float(wavelengths.max()),
+    }
+
+
+async def _resolve(espectro_id):
+    """
+    Un id es el hash de un espectro subido o el nombre de una galaxia del catálogo.
+    Retorna (clave, descriptor) con una referencia tomada en _store, que el llamador
+    debe liberar con _store.release(clave), o None si el espectro no existe.
+    Un archivo del catálogo que no se puede leer lanza InvalidSpectrumError.
+    """
+    if espectro_id in _uploads:
+        _uploads.move_to_end(espectro_id)
+        clave = ("subida", espectro_id)
+        return clave, _store.acquire(clave)
+    galaxia = await run_in_threadpool(get_galaxy, espectro_id)
+    if galaxia is None:
+        return None
+    ruta = galaxia["ruta"]
+    clave = ("catalogo", ruta, galaxia["mtime_ns"])
+    descriptor = _store.acquire(clave)
+    if descriptor is not None:
+        if _catalog_spectra.get(ruta) == clave:
+            _catalog_spectra.move_to_end(ruta)
+        else:
+            # La LRU ya lo había soltado, pero un trabajo en curso lo mantiene publicado:
+            # vuelve a la LRU con una referencia propia
+            _track_catalog(ruta, clave, _store.acquire(clave))
+        return clave, descriptor
+
+    try:
+        arreglos, atributos = await _run(_parse_job, "archivo", ruta)
+    except FileNotFoundError:
+        return None  # El archivo se borró después de indexarlo
+    # Otra petición pudo publicar el mismo espectro mientras se leía
+    descriptor = _store.acquire(clave)
+    if descriptor is not None:
+        return clave, descriptor
+    _track_catalog(ruta, clave, _store.publish(clave, atributos, **arreglos))
+    return clave, _store.acquire(clave)
+
+
+def _track_catalog(ruta, clave, descriptor):
+    """
+    Deja la clave en la LRU de espectros del catálogo, que se queda con la referencia
+    ya tomada (descriptor); suelta la versión vieja del archivo y las más antiguas.
+    """
+    anterior = _catalog_spectra.pop(ruta, None)
+    if anterior is not None:
+        _store.release(anterior)  # versión vieja del archivo
+    _catalog_spectra[ruta] = clave
+    while len(_catalog_spectra) > MAX_CATALOG_SPECTRA:
+        _, vieja = _catalog_spectra.popitem(last=False)
+        _store.release(vieja)
+
+
+def _check_sonify(parametros):
+    """
+    Retorna un mensaje de error si los parámetros no tienen sentido, o None.
+    Se revisa antes de ocupar un worker.
+    """
+    rango = parametros["rango_onda"]
+    if len(rango) != 2 or not rango[0] < rango[1]:
+        return "rango_onda debe tener dos valores crecientes: [mínimo, máximo]."
+    if not all(math.isfinite(x) for x in (*rango, parametros["duracion_nota"])):
+        return "rango_onda y duracion_nota deben ser números finitos."
+    if parametros["tempo"] <= 0 or parametros["duracion_nota"] <= 0:
+        return "tempo y duracion_nota deben ser positivos."
+    if not all(0 <= parametros[k] <= 127 for k in ("instrumento_emision", "instrumento_absorcion")):
+        return "Los instrumentos deben ser programas MIDI entre 0 y 127."
+    if not 1 <= parametros["num_octavas"] <= MAX_OCTAVES:
+        return f"num_octavas debe estar entre 1 y {MAX_OCTAVES}."
+    if parametros["duracion_objetivo"] is not None and not 0 < parametros["duracion_objetivo"] <= MAX_TARGET_DURATION:
+        return f"duracion_objetivo debe estar entre 0 y {MAX_TARGET_DURATION} segundos."
+    return None
+
+
+def _parse_range(query):
+    if "min" not in query and "max" not in query:
+        return None
+    return (float(query.get("min", "-inf")), float(query.get("max", "inf")))
+
+
+async def listar_galaxias(request):
+    prefijo = request.query_params.get("prefijo", "")
+    await run_in_threadpool(refresh_catalog, DATA_DIR)
+    nombres = await run_in_threadpool(search_galaxies, prefijo)
+    return JSONResponse({"galaxias": nombres})
+
+
+async def subir_espectro(request):
+    declarado = request.headers.get("content-length")
+    if declarado is not None and int(declarado) > MAX_UPLOAD_BYTES:
+        return _error("El archivo supera el tamaño máximo permitido.", 413)
+    partes = []
+    total = 0
+    async for parte in request.stream():
+        total += len(parte)
+        if total > MAX_UPLOAD_BYTES:
+            return _error("El archivo supera el tamaño máximo permitido.", 413)
+        partes.append(parte)
+    contenido = b"".join(partes)
+
+    espectro_id = hashlib.sha256(contenido).hexdigest()
+    if espectro_id in _uploads:
+        # Ya validado y publicado: subir el mismo archivo otra vez no pasa por el pool
+        _uploads.move_to_end(espectro_id)
+        return JSONResponse({"id": espectro_id, **_uploads[espectro_id]}, status_code=201)
+    try:
+        arreglos, atributos = await _run(_parse_job, "bytes", contenido)
+    except _Busy:
+        return _error("Servidor ocupado, intenta de nuevo.", 503)
+    except InvalidSpectrumError as e:
+        return _error(str(e), 400)
+    if espectro_id not in _uploads:
+        _store.publish(("subida", espectro_id), atributos, **arreglos)
+        _uploads[espectro_id] = _summary(arreglos["longitud_onda"])
+    while len(_uploads) > MAX_UPLOADS:
+        viejo, _ = _uploads.popitem(last=False)
+        _store.release(("subida", viejo))
+    return JSONResponse({"id": espectro_id, **_uploads[espectro_id]}, status_code=201)
+
+
+async def datos_grafica(request):
+    try:
+        rango_onda = _parse_range(request.query_params)
+        puntos = min(int(request.query_params.get("puntos", 1000)), MAX_PLOT_POINTS)
+    except ValueError:
+        return _error("Parámetros inválidos.", 400)
+    if puntos < 1:
+        return _error("puntos debe ser al menos 1.", 400)
+    try:
+        resuelto = await _resolve(request.path_params["espectro_id"])
+        if resuelto is None:
+            return _error("Espectro no encontrado.", 404)
+        clave, descriptor = resuelto
+        try:
+            return JSONResponse(await _run(_plot_job, descriptor, rango_onda, puntos))
+        finally:
+            _store.release(clave)
+    except _Busy:
+        return _error("Servidor ocupado, intenta de nuevo.", 503)
+    except ValueError as e:
+        return _error(str(e), 400)
+    except Exception as e:
+        print(f"Error graficando {request.path_params['espectro_id']}: {e!r}")
+        return _error("Error interno al preparar la gráfica.", 500)
+
+
+async def sonificar(request):
+    espectro_id = request.path_params["espectro_id"]
+    try:
+        cuerpo = await request.json()
+    except ValueError:
+        return _error("Se esperaba un cuerpo JSON.", 400)
+    try:
+        # Una escala por nombre (src.scales.SCALES) o intervalos explícitos en `divisiones` pasos por octava
+        if cuerpo.get("escala") is not None:
+            notas_escala, divisiones = resolve_scale(escala=str(cuerpo["escala"]))
+        else:
+            notas_escala, divisiones = resolve_scale(
+                [int(n) for n in cuerpo.get("notas_escala", [0, 2, 3, 5, 7, 8, 11])], cuerpo.get("divisiones", 12)
+            )
+        parametros = {
+            "tipo_galaxia": str(cuerpo.get("tipo_galaxia", "Espiral")),
+            "rango_onda": tuple(float(x) for x in cuerpo.get("rango_onda", (6500, 6700))),
+            "tempo": int(cuerpo.get("tempo", 120)),
+            "duracion_nota": float(cuerpo.get("duracion_nota", 1.0)),
+            "instrumento_emision": int(cuerpo.get("instrumento_emision", 0)),
+            "instrumento_absorcion": int(cuerpo.get("instrumento_absorcion", 24)),
+            "num_octavas": int(cuerpo.get("num_octavas", 5)),
+            "notas_escala": list(notas_escala),
+            "divisiones": divisiones,
+            "expresivo": bool(cuerpo.get("expresivo", True)),
+            "pitch_bend": bool(cuerpo.get("pitch_bend", False)),
+            "solo_lineas": bool(cuerpo.get("solo_lineas", False)),
+            "duracion_objetivo": (
+                float(cuerpo["duracion_objetivo"]) if cuerpo.get("duracion_objetivo") is not None else None
+            ),
+        }
+    except (AttributeError, TypeError, ValueError):
+        return _error("Parámetros de sonificación inválidos.", 400)
+    problema = _check_sonify(parametros)
+    if problema is not None:
+        return _error(problema, 400)
+    nombre = os.path.splitext(os.path.basename(espectro_id))[0][:64]
+    job_id = uuid.uuid4().hex
+    job_dir = os.path.join(OUTPUT_DIR, job_id)
+    try:
+        resuelto = await _resolve(espectro_id)
+        if resuelto is None:
+            return _error("Espectro no encontrado.", 404)
+        clave, descriptor = resuelto
+        try:
+            resultado = await _run(
+                _sonify_job, descriptor, nombre, parametros, job_dir, bool(cuerpo.get("audio", False))
+            )
+        finally:
+            _store.release(clave)
+    except _Busy:
+        return _error("Servidor ocupado, intenta de nuevo.", 503)
+    except ValueError as e:
+        shutil.rmtree(job_dir, ignore_errors=True)
+        return _error(str(e), 400)
+    except Exception as e:
+        shutil.rmtree(job_dir, ignore_errors=True)
+        print(f"Error sonificando {espectro_id}: {e!r}")
+        return _error("Error interno al sonificar el espectro.", 500)
+
+    _jobs[job_id] = job_dir
+    while len(_jobs) > MAX_JOBS:
+        _, viejo = _jobs.popitem(last=False)
+        shutil.rmtree(viejo, ignore_errors=True)
+    return JSONResponse(
+        {
+            "trabajo": job_id,
+            "artefactos": [f"/artefactos/{job_id}/{a}" for a in resultado["artefactos"]],
+            "avisos": resultado["avisos"],
+        },
+        status_code=201,
+    )
+
+
+async def artefacto(request):
+    job_dir = _jobs.get(request.path_params["trabajo"])
+    nombre = os.path.basename(request.path_params["nombre"])
+    if job_dir is None:
+        return _error("Trabajo no encontrado.", 404)
+    ruta = os.path.join(job_dir, nombre)
+    if not os.path.isfile(ruta):
+        return _error("Artefacto no encontrado.", 404)
+    return FileResponse(ruta, filename=nombre)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    global _pool, _pending, _store
+    # spawn en lugar de fork: el proceso del servidor ya tiene hilos y un loop de eventos
+    contexto = multiprocessing.get_context("spawn")
+    _pool = contexto.Pool(NUM_WORKERS, initializer=_init_worker, maxtasksperchild=MAX_TASKS_PER_WORKER)
+    _pending = asyncio.Semaphore(MAX_PENDING)
+    _store = SharedArrayStore()
+    try:
+        yield
+    finally:
+        _pool.terminate()
+        _pool.join()
+        _store.close()
+        _uploads.clear()
+        _catalog_spectra.clear()
+        for job_dir in _jobs.values():
+            shutil.rmtree(job_dir, ignore_errors=True)
+        _jobs.clear()
+
+
+app = Starlette(
+    routes=[
+        Route("/galaxias", listar_galaxias, methods=["GET"]),
+        Route("/espectros", subir_espectro, methods=["POST"]),
+        Route("/espectros/{espectro_id}/grafica", datos_grafica, methods=["GET"]),
+        Route("/espectros/{espectro_id}/sonificar", sonificar, methods=["POST"]),
+        Route("/artefactos/{trabajo}/{nombre}", artefacto, methods=["GET"]),
+    ],
+    lifespan=lifespan,
+)
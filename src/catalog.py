@@ -0,0 +1,232 @@
+# src/catalog.py
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from src.ingest import parse_spectrum_bytes
+from src.spectrum import as_spectrum
+
+CATALOG_PATH = os.path.join("data", ".catalogo.sqlite")
+DESCRIPTIONS_FILE = "descripciones.json"
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+SCHEMA_VERSION = 2
+# Sin cambios en el directorio, el recorrido completo (un stat por espectro) se repite como mucho
+# cada REFRESH_INTERVAL segundos; así se notan también los archivos editados en su lugar
+REFRESH_INTERVAL = 30.0
+
+# Rango usado para clasificar la galaxia por su flujo medio (igual que funciones.tipo)
+CLASSIFICATION_RANGE = (3800, 4200)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS galaxias (
+    nombre TEXT PRIMARY KEY COLLATE NOCASE,
+    ruta TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    imagen TEXT,
+    descripcion TEXT,
+    n_muestras INTEGER,
+    lambda_min REAL,
+    lambda_max REAL,
+    clasificacion TEXT,
+    redshift REAL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    clave TEXT PRIMARY KEY,
+    valor TEXT
+);
+"""
+
+
+# (directorio, base de datos) -> (mtime del directorio, instante del último recorrido)
+_scans = {}
+_scans_lock = threading.Lock()
+# Conexiones abiertas por hilo (sqlite3 no comparte una conexión entre hilos)
+_local = threading.local()
+
+
+def _connect(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version != SCHEMA_VERSION:
+        # Esquema viejo o archivo nuevo: se reconstruye desde cero
+        conn.executescript("DROP TABLE IF EXISTS galaxias; DROP TABLE IF EXISTS meta;")
+        conn.executescript(_SCHEMA)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+    return conn
+
+
+def _connection(db_path):
+    """
+    Conexión reutilizable del hilo actual: buscar y consultar en cada rerun no vuelve
+    a abrir la base ni a revisar el esquema.
+    """
+    conexiones = getattr(_local, "conexiones", None)
+    if conexiones is None:
+        conexiones = _local.conexiones = {}
+    conn = conexiones.get(db_path)
+    if conn is None:
+        conn = conexiones[db_path] = _connect(db_path)
+    return conn
+
+
+def classify(wavelengths, intensities=None, rango_onda=CLASSIFICATION_RANGE):
+    """
+    Clasifica la galaxia según el flujo medio en el rango dado.
+    Retorna None si el espectro no cubre el rango.
+    """
+    seleccion = as_spectrum(wavelengths, intensities).select(rango_onda)
+    if len(seleccion) == 0:
+        return None
+    media = float(np.mean(seleccion.intensities))
+    if media > 2:
+        return "Irregular"
+    if media >= 1:
+        return "Espiral"
+    return "Eliptica"
+
+
+def _describe_spectrum(path):
+    # Misma lectura y validación que los archivos subidos; el z sale del encabezado ("# z = ...")
+    with open(path, "rb") as f:
+        espectro = parse_spectrum_bytes(f.read(), max_bytes=None)
+    return (
+        len(espectro),
+        espectro.min_wavelength,
+        espectro.max_wavelength,
+        classify(espectro),
+        espectro.z,
+    )
+
+
+def _load_descriptions(conn, data_dir, forzar):
+    """
+    Lee el archivo de descripciones solo si cambió desde la última actualización.
+    Retorna el diccionario de descripciones o None si no hubo cambios.
+    """
+    path = os.path.join(data_dir, DESCRIPTIONS_FILE)
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        mtime_ns = 0
+    fila = conn.execute("SELECT valor FROM meta WHERE clave = 'descripciones_mtime'").fetchone()
+    if not forzar and fila is not None and int(fila["valor"]) == mtime_ns:
+        return None
+    conn.execute(
+        "INSERT OR REPLACE INTO meta (clave, valor) VALUES ('descripciones_mtime', ?)", (str(mtime_ns),)
+    )
+    if mtime_ns == 0:
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def refresh_catalog(data_dir="data", db_path=CATALOG_PATH, forzar=False):
+    """
+    Actualiza el índice de galaxias de forma incremental.
+    Solo se vuelven a leer los espectros cuyo mtime cambió; las imágenes se
+    resuelven con un único recorrido del directorio. Si el directorio no cambió
+    (mismo mtime) y el último recorrido es de hace menos de REFRESH_INTERVAL
+    segundos, no se recorre.
+    Retorna el número de espectros que se (re)indexaron.
+    """
+    clave = (os.path.abspath(data_dir), os.path.abspath(db_path))
+    mtime_dir = os.stat(data_dir).st_mtime_ns
+    with _scans_lock:
+        previo = _scans.get(clave)
+    if not forzar and previo is not None and previo[0] == mtime_dir and time.monotonic() - previo[1] < REFRESH_INTERVAL:
+        return 0
+
+    espectros = {}
+    imagenes = {}
+    with os.scandir(data_dir) as entradas:
+        for entrada in entradas:
+            if not entrada.is_file():
+                continue
+            base, ext = os.path.splitext(entrada.name)
+            ext = ext.lower()
+            if ext == ".txt":
+                espectros[entrada.name] = entrada
+            elif ext in IMAGE_EXTENSIONS:
+                # Mismo orden de preferencia que antes: .png, luego .jpg, luego .jpeg
+                previa = imagenes.get(base)
+                if previa is None or IMAGE_EXTENSIONS.index(ext) < IMAGE_EXTENSIONS.index(
+                    os.path.splitext(previa)[1].lower()
+                ):
+                    imagenes[base] = entrada.name
+
+    actualizados = 0
+    conn = _connection(db_path)
+    with conn:
+        indexados = {
+            fila["nombre"]: (fila["mtime_ns"], fila["imagen"])
+            for fila in conn.execute("SELECT nombre, mtime_ns, imagen FROM galaxias")
+        }
+        eliminados = [nombre for nombre in indexados if nombre not in espectros]
+        conn.executemany("DELETE FROM galaxias WHERE nombre = ?", [(n,) for n in eliminados])
+
+        for nombre, entrada in espectros.items():
+            mtime_ns = entrada.stat().st_mtime_ns
+            imagen = imagenes.get(os.path.splitext(nombre)[0])
+            imagen_path = os.path.join(data_dir, imagen) if imagen else None
+            indexado = indexados.get(nombre)
+            if not forzar and indexado is not None and indexado[0] == mtime_ns:
+                # El espectro no cambió; solo se escribe la imagen si apareció o se borró una
+                if indexado[1] != imagen_path:
+                    conn.execute("UPDATE galaxias SET imagen = ? WHERE nombre = ?", (imagen_path, nombre))
+                continue
+            try:
+                n_muestras, lambda_min, lambda_max, clasificacion, redshift = _describe_spectrum(entrada.path)
+            except Exception as e:
+                print(f"Error indexando {entrada.path}: {e}")
+                n_muestras = lambda_min = lambda_max = clasificacion = redshift = None
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO galaxias
+                    (nombre, ruta, mtime_ns, imagen, descripcion, n_muestras, lambda_min, lambda_max,
+                     clasificacion, redshift)
+                VALUES (?, ?, ?, ?, NULL, ?, ?, ?, ?, ?)
+                """,
+                (nombre, entrada.path, mtime_ns, imagen_path,
+                 n_muestras, lambda_min, lambda_max, clasificacion, redshift),
+            )
+            actualizados += 1
+
+        descripciones = _load_descriptions(conn, data_dir, forzar or actualizados > 0)
+        if descripciones is not None:
+            conn.execute("UPDATE galaxias SET descripcion = NULL")
+            conn.executemany(
+                "UPDATE galaxias SET descripcion = ? WHERE nombre = ?",
+                [(texto, nombre) for nombre, texto in descripciones.items()],
+            )
+    # Se vuelve a leer el mtime: escribir en la base (si está dentro de data_dir) crea y borra
+    # su journal; un archivo agregado durante el recorrido se ve a más tardar en REFRESH_INTERVAL
+    with _scans_lock:
+        _scans[clave] = (os.stat(data_dir).st_mtime_ns, time.monotonic())
+    return actualizados
+
+
+def search_galaxies(prefijo="", db_path=CATALOG_PATH, limite=None):
+    """
+    Lista los nombres de galaxias que empiezan por el prefijo dado (sin distinguir mayúsculas).
+    """
+    # Consulta por rango sobre la clave primaria (COLLATE NOCASE) para usar el índice
+    consulta = "SELECT nombre FROM galaxias WHERE nombre >= ? AND nombre < ? ORDER BY nombre"
+    parametros = [prefijo, prefijo + "\U0010ffff"]
+    if limite is not None:
+        consulta += " LIMIT ?"
+        parametros.append(int(limite))
+    return [fila["nombre"] for fila in _connection(db_path).execute(consulta, parametros)]
+
+
+def get_galaxy(nombre, db_path=CATALOG_PATH):
+    """
+    Retorna los metadatos de una galaxia como diccionario, o None si no está indexada.
+    """
+    fila = _connection(db_path).execute("SELECT * FROM galaxias WHERE nombre = ?", (nombre,)).fetchone()
+    return dict(fila) if fila is not None else None
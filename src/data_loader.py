@@ -1,11 +1,16 @@
 import os
 
-import pandas as pd
-
 def load_galaxy_data(file_path):
+    """
+    Lee un archivo de espectro separado por ';' y lo retorna como Spectrum
+    (antes era df.values, un arreglo (n, 2)).
+    """
+    import pandas as pd
+    from src.spectrum import Spectrum
+
     try:
         df = pd.read_csv(file_path, delimiter=';', comment='#')
-        return df.values
+        return Spectrum.from_dataframe(df, nombre=os.path.splitext(os.path.basename(file_path))[0])
     except Exception as e:
         print(f"Error cargando archivo {file_path}: {e}")
         return None
@@ -0,0 +1,55 @@
+# src/downsampling.py
+import numpy as np
+
+
+def minmax_downsample(y, n_puntos):
+    """
+    Reduce una serie a lo sumo n_puntos conservando el mínimo y el máximo de
+    cada tramo, para que las líneas no desaparezcan al graficar.
+    Retorna los índices (ordenados) de las muestras conservadas.
+    """
+    n = len(y)
+    if n <= n_puntos:
+        return np.arange(n)
+    n_tramos = max(1, n_puntos // 2)
+    tamano = -(-n // n_tramos)  # división hacia arriba
+    relleno = np.full(n_tramos * tamano, np.nan)
+    relleno[:n] = y
+    tramos = relleno.reshape(n_tramos, tamano)
+    validos = ~np.isnan(tramos).all(axis=1)
+    offsets = np.arange(n_tramos)[validos] * tamano
+    idx_min = np.nanargmin(tramos[validos], axis=1) + offsets
+    idx_max = np.nanargmax(tramos[validos], axis=1) + offsets
+    return np.unique(np.concatenate([idx_min, idx_max]))
+
+
+def feature_preserving_decimation(y, n_max, conservar=None):
+    """
+    Elige a lo sumo n_max muestras de y para reducir la cantidad de notas sin perder
+    los rasgos del espectro: primero se conservan los índices de `conservar` (en orden
+    de prioridad, por ejemplo los extremos de las líneas detectadas) y el resto del
+    presupuesto se llena con el mínimo y el máximo de cada tramo.
+    Retorna los índices (ordenados) de las muestras conservadas.
+    """
+    n = len(y)
+    if n <= n_max:
+        return np.arange(n)
+    if n_max <= 0:
+        return np.array([], dtype=int)
+    if conservar is None:
+        conservar = np.array([], dtype=int)
+    # dict.fromkeys quita repetidos manteniendo el orden de prioridad
+    conservar = np.array(list(dict.fromkeys(int(i) for i in conservar if 0 <= i < n)), dtype=int)[:n_max]
+    indices = conservar
+    pedido = n_max - len(indices)
+    for _ in range(8):  # unas pocas rondas bastan para llenar el presupuesto
+        faltan = n_max - len(indices)
+        if faltan <= 0:
+            break
+        candidatos = np.setdiff1d(minmax_downsample(y, pedido), indices)
+        if len(candidatos) > faltan:
+            # Submuestreo parejo para no favorecer el principio del espectro
+            candidatos = candidatos[np.linspace(0, len(candidatos) - 1, faltan).astype(int)]
+        indices = np.union1d(indices, candidatos)
+        pedido += faltan
+    return np.unique(indices)
@@ -0,0 +1,79 @@
+# src/image_pipeline.py
+import hashlib
+import os
+
+PREVIEW_DIR = os.path.join("cache", "miniaturas")
+PREVIEW_WIDTHS = (320, 640, 1280)
+
+# (ruta, mtime_ns, tamaño) -> hash del contenido, para no releer la imagen en cada rerun
+_hashes = {}
+
+
+def _content_hash(image_path):
+    stat = os.stat(image_path)
+    clave = (os.path.abspath(image_path), stat.st_mtime_ns, stat.st_size)
+    digest = _hashes.get(clave)
+    if digest is None:
+        h = hashlib.sha1()
+        with open(image_path, "rb") as f:
+            for bloque in iter(lambda: f.read(1 << 20), b""):
+                h.update(bloque)
+        digest = h.hexdigest()
+        _hashes[clave] = digest
+    return digest
+
+
+def _preview_path(digest, ancho, formato, preview_dir):
+    extension = "webp" if formato == "WEBP" else "jpg"
+    return os.path.join(preview_dir, f"{digest}_{ancho}.{extension}")
+
+
+def _render_previews(image_path, digest, formato, preview_dir):
+    """
+    Decodifica la imagen original una sola vez y escribe todas las miniaturas.
+    """
+    from PIL import Image
+
+    os.makedirs(preview_dir, exist_ok=True)
+    with Image.open(image_path) as img:
+        # Para JPEG, draft() deja que el decodificador reduzca la escala directamente
+        img.draft("RGB", (max(PREVIEW_WIDTHS), max(PREVIEW_WIDTHS)))
+        img = img.convert("RGB")
+        # De mayor a menor, cada miniatura se reduce desde la anterior
+        for ancho in sorted(PREVIEW_WIDTHS, reverse=True):
+            if img.width > ancho:
+                alto = max(1, round(img.height * ancho / img.width))
+                img = img.resize((ancho, alto), Image.LANCZOS)
+            destino = _preview_path(digest, ancho, formato, preview_dir)
+            temporal = f"{destino}.{os.getpid()}.tmp"
+            if formato == "WEBP":
+                img.save(temporal, format="WEBP", quality=80, method=4)
+            else:
+                img.save(temporal, format="JPEG", quality=85, optimize=True, progressive=True)
+            os.replace(temporal, destino)
+
+
+def _preferred_format():
+    from PIL import features
+
+    return "WEBP" if features.check("webp") else "JPEG"
+
+
+def get_preview(image_path, ancho=640, preview_dir=PREVIEW_DIR):
+    """
+    Retorna la ruta de una miniatura de la imagen con al menos el ancho pedido
+    (o la más grande disponible). Las miniaturas se generan una sola vez por
+    contenido y se reutilizan en los siguientes reruns.
+    """
+    digest = _content_hash(image_path)
+    formato = _preferred_format()
+    candidatos = [w for w in PREVIEW_WIDTHS if w >= ancho]
+    ancho_servido = min(candidatos) if candidatos else max(PREVIEW_WIDTHS)
+    ruta = _preview_path(digest, ancho_servido, formato, preview_dir)
+    if not os.path.exists(ruta):
+        try:
+            _render_previews(image_path, digest, formato, preview_dir)
+        except Exception as e:
+            print(f"Error generando miniatura de {image_path}: {e}")
+            return image_path
+    return ruta
@@ -0,0 +1,100 @@
+# src/ingest.py
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from src.rest_frame import parse_header_redshift
+from src.spectrum import Spectrum
+
+MAX_UPLOAD_BYTES = 5 * 1024 * 1024  # 5 MB
+HEADER_LINES = 20
+MIN_SAMPLES = 101  # detectar_region_plana necesita más muestras que la ventana (100)
+CACHE_SIZE = 16
+
+# hash del contenido -> Spectrum ya validado (LRU); es de solo lectura, así que compartirlo es seguro
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class InvalidSpectrumError(ValueError):
+    """El archivo subido no es un espectro válido."""
+
+
+def sniff_header(contenido):
+    """
+    Retorna (filas a saltar, separador) mirando la primera línea que no es comentario:
+    si no es numérica es un encabezado y se salta junto con los comentarios previos.
+    """
+    lineas = bytes(contenido[:4096]).decode("utf-8", errors="replace").splitlines()
+    for i, linea in enumerate(lineas):
+        linea = linea.strip()
+        if not linea or linea.startswith("#"):
+            continue
+        sep = ";" if ";" in linea else r"\s+"
+        try:
+            [float(x) for x in linea.replace(";", " ").split()]
+            return i, sep  # No es encabezado
+        except ValueError:
+            return i + 1, sep  # Es encabezado
+    return 0, r"\s+"
+
+
+def _validate(datos):
+    if datos.shape[1] < 2:
+        raise InvalidSpectrumError("Se esperaban dos columnas: longitud de onda y flujo.")
+    datos = datos.iloc[:, :2].astype(float)
+    valores = datos.to_numpy()
+    if len(valores) < MIN_SAMPLES:
+        raise InvalidSpectrumError(f"El espectro tiene {len(valores)} muestras; se necesitan al menos {MIN_SAMPLES}.")
+    if not np.isfinite(valores).all():
+        fila = int(np.flatnonzero(~np.isfinite(valores).all(axis=1))[0])
+        raise InvalidSpectrumError(f"Hay valores vacíos o no numéricos (fila de datos {fila + 1}).")
+    if not (np.diff(valores[:, 0]) > 0).all():
+        raise InvalidSpectrumError("Las longitudes de onda deben estar en orden creciente y sin repetir.")
+    return datos
+
+
+def parse_spectrum_bytes(contenido, max_bytes=MAX_UPLOAD_BYTES):
+    """
+    Lee un espectro directamente desde los bytes subidos (bytes o memoryview), sin pasar por disco.
+    Valida tamaño, columnas, orden y valores faltantes antes de cualquier cálculo,
+    y guarda el resultado por hash del contenido: subir el mismo archivo otra vez
+    no vuelve a leerlo. Con max_bytes=None no se limita el tamaño (archivos del catálogo).
+    Retorna un Spectrum; el redshift declarado en el encabezado (o None) queda en
+    espectro.z.
+    """
+    import pandas as pd
+
+    if len(contenido) == 0:
+        raise InvalidSpectrumError("El archivo está vacío.")
+    if max_bytes is not None and len(contenido) > max_bytes:
+        raise InvalidSpectrumError(f"El archivo supera el tamaño máximo de {max_bytes // (1024 * 1024)} MB.")
+
+    clave = hashlib.sha256(contenido).hexdigest()
+    with _cache_lock:
+        if clave in _cache:
+            _cache.move_to_end(clave)
+            return _cache[clave]
+
+    # Misma detección de encabezado que cargar_datos, pero sobre los bytes
+    skip, sep = sniff_header(contenido)
+
+    try:
+        # BytesIO copia un memoryview (con bytes lo comparte); solo ocurre si no estaba en caché
+        datos = pd.read_csv(io.BytesIO(contenido), sep=sep, comment="#", header=None, skiprows=skip)
+        datos = datos.apply(pd.to_numeric, errors="coerce")
+    except Exception as e:
+        raise InvalidSpectrumError(f"No se pudo leer el archivo: {e}")
+    datos = _validate(datos)
+    # Redshift declarado en el encabezado, si lo hay (se usa para el marco en reposo)
+    encabezado = bytes(contenido[:4096]).decode("utf-8", errors="replace").splitlines()[:HEADER_LINES]
+    espectro = Spectrum.from_dataframe(datos, z=parse_header_redshift(encabezado))
+
+    with _cache_lock:
+        _cache[clave] = espectro
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return espectro
@@ -0,0 +1,274 @@
+# src/line_detector.py
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from src.spectrum import as_spectrum
+
+# Longitudes de onda en reposo (Å, aire) de líneas comunes en espectros de galaxias y tipos de
+# detección con que pueden aparecer (las de Balmer son de emisión o de absorción según la galaxia)
+EMISION = ("emision",)
+ABSORCION = ("absorcion",)
+AMBOS = ("emision", "absorcion")
+KNOWN_LINES = {
+    "[OII] 3727": (3727.4, EMISION),
+    "Ca II K": (3933.7, ABSORCION),
+    "Ca II H": (3968.5, ABSORCION),
+    "Hδ": (4101.7, AMBOS),
+    "Banda G": (4304.4, ABSORCION),
+    "Hγ": (4340.5, AMBOS),
+    "Hβ": (4861.3, AMBOS),
+    "[OIII] 4959": (4958.9, EMISION),
+    "[OIII] 5007": (5006.8, EMISION),
+    "Mg b": (5175.4, ABSORCION),
+    "Na D": (5892.9, ABSORCION),
+    "[OI] 6300": (6300.3, EMISION),
+    "[NII] 6548": (6548.0, EMISION),
+    "Hα": (6562.8, AMBOS),
+    "[NII] 6583": (6583.4, EMISION),
+    "[SII] 6716": (6716.4, EMISION),
+    "[SII] 6731": (6730.8, EMISION),
+}
+
+CACHE_SIZE = 64
+
+# (huella del espectro, parámetros) -> índice de líneas (LRU)
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _noise_sigma(intensities):
+    # Desviación robusta (MAD) de la primera diferencia: no la infla el continuo ni las líneas anchas
+    diferencias = np.diff(intensities)
+    if len(diferencias) == 0:
+        return 0.0
+    mad = np.median(np.abs(diferencias - np.median(diferencias)))
+    return 1.4826 * mad / np.sqrt(2)
+
+
+def _find(wavelengths, senal, umbral, sigma, ventana, tipo):
+    from scipy.signal import find_peaks
+
+    # wlen acota la prominencia al entorno local: un valle ancho entre dos líneas no cuenta como línea
+    picos, props = find_peaks(senal, prominence=umbral, wlen=ventana, width=1, rel_height=0.5)
+    indices = np.arange(len(wavelengths))
+    return {
+        "longitud_onda": wavelengths[picos],
+        "indice": picos,
+        "tipo": np.full(len(picos), tipo, dtype=object),
+        "inicio": np.interp(props["left_ips"], indices, wavelengths),
+        "fin": np.interp(props["right_ips"], indices, wavelengths),
+        "prominencia": props["prominences"],
+        "significancia": props["prominences"] / sigma,
+    }
+
+
+def _continuum(intensities, excluir, ventana):
+    """
+    Continuo local: mediana móvil del flujo en `ventana` muestras, sin contar las muestras
+    marcadas en `excluir` (las líneas de emisión). NaN donde toda la ventana está excluida.
+    """
+    import warnings
+
+    medio = ventana // 2
+    flujo = np.where(excluir, np.nan, intensities)
+    flujo = np.concatenate([np.full(medio, np.nan), flujo, np.full(medio, np.nan)])
+    ventanas = np.lib.stride_tricks.sliding_window_view(flujo, 2 * medio + 1)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # ventanas sin ninguna muestra válida
+        return np.nanmedian(ventanas, axis=1)
+
+
+def _window_mask(wavelengths, inicios, fines):
+    # Una muestra está dentro si hay más ventanas abiertas que cerradas antes de ella
+    abiertas = np.searchsorted(np.sort(inicios), wavelengths, side="right")
+    cerradas = np.searchsorted(np.sort(fines), wavelengths, side="left")
+    return abiertas > cerradas
+
+
+def _absorption(wavelengths, intensities, emision, umbral, sigma, ventana):
+    """
+    Valles medidos contra el continuo local (sin las líneas de emisión) en lugar de contra
+    los picos vecinos: el hueco entre dos líneas de emisión no es una absorción.
+    """
+    ancho = emision["fin"] - emision["inicio"]
+    en_emision = _window_mask(wavelengths, emision["inicio"] - ancho, emision["fin"] + ancho)
+    continuo = _continuum(intensities, en_emision, ventana)
+    # Profundidad bajo el continuo; lo que queda por encima (o sin continuo) no cuenta
+    profundidad = np.nan_to_num(np.clip(continuo - intensities, 0.0, None), nan=0.0)
+    absorcion = _find(wavelengths, profundidad, umbral, sigma, ventana, "absorcion")
+
+    # Se descartan los valles con picos de emisión a ambos lados dentro de la ventana
+    picos = emision["indice"]
+    valles = absorcion["indice"]
+    izquierda = np.searchsorted(picos, valles, side="left") - np.searchsorted(picos, valles - ventana // 2, side="left")
+    derecha = np.searchsorted(picos, valles + ventana // 2, side="right") - np.searchsorted(picos, valles, side="right")
+    conservar = (izquierda == 0) | (derecha == 0)
+    return {k: v[conservar] for k, v in absorcion.items()}
+
+
+def _identify(centros, significancias, tipos, z, tolerancia):
+    """
+    Empareja las líneas conocidas con detecciones de su tipo dentro de la tolerancia.
+    Cada línea prefiere la detección más significativa y cada detección se queda con la
+    línea más cercana; la línea desplazada pasa a su siguiente candidata.
+    """
+    identificadas = np.full(len(centros), None, dtype=object)
+    if len(centros) == 0:
+        return identificadas
+    nombres = list(KNOWN_LINES)
+    observadas = np.array([longitud for longitud, _ in KNOWN_LINES.values()]) * (1 + z)
+    distancias = np.abs(centros[:, None] - observadas[None, :])
+    # Candidatas de cada línea, de la más a la menos significativa
+    candidatas = []
+    for j, (_, tipos_linea) in enumerate(KNOWN_LINES.values()):
+        cerca = np.flatnonzero((distancias[:, j] <= tolerancia) & np.isin(tipos, tipos_linea))
+        candidatas.append(list(cerca[np.argsort(-significancias[cerca], kind="stable")]))
+
+    asignadas = {}  # detección -> línea
+    pendientes = list(range(len(nombres)))[::-1]
+    while pendientes:
+        j = pendientes.pop()
+        while candidatas[j]:
+            i = candidatas[j].pop(0)
+            actual = asignadas.get(i)
+            if actual is None or distancias[i, j] < distancias[i, actual]:
+                asignadas[i] = j
+                if actual is not None:
+                    pendientes.append(actual)
+                break
+    for i, j in asignadas.items():
+        identificadas[i] = nombres[j]
+    return identificadas
+
+
+def _cache_key(espectro, min_significancia, min_contraste, z, tolerancia, ventana):
+    return (espectro.fingerprint, float(min_significancia), float(min_contraste),
+            float(z), float(tolerancia), int(ventana))
+
+
+def detect_lines(wavelengths, intensities=None, min_significancia=5.0, min_contraste=0.1, z=None, tolerancia=8.0,
+                 ventana=41):
+    """
+    Detecta líneas de emisión (picos) y absorción (valles) con su ancho y significancia
+    (prominencia / ruido), y las identifica con KNOWN_LINES (del mismo tipo) desplazadas al
+    redshift z; sin z se usa el del espectro (o 0).
+    Una línea debe superar min_significancia veces el ruido y min_contraste veces la
+    mediana del flujo; la prominencia se mide en una ventana de `ventana` muestras y, para
+    los valles, respecto al continuo local (mediana de la ventana sin las líneas de emisión).
+    El índice se guarda en caché por espectro, así que llamarlo en cada rerun no recalcula nada.
+    Retorna un DataFrame ordenado por longitud de onda con columnas:
+    longitud_onda, indice, tipo, inicio, fin, ancho, flujo, prominencia, significancia, linea.
+    """
+    import pandas as pd
+
+    espectro = as_spectrum(wavelengths, intensities)
+    wavelengths, intensities = espectro.wavelengths, espectro.intensities
+    if z is None:
+        z = espectro.z or 0.0
+    clave = _cache_key(espectro, min_significancia, min_contraste, z, tolerancia, ventana)
+    with _cache_lock:
+        if clave in _cache:
+            _cache.move_to_end(clave)
+            return _cache[clave]
+
+    sigma = _noise_sigma(intensities)
+    if sigma > 0 and len(intensities) > 2:
+        umbral = max(min_significancia * sigma, min_contraste * np.median(np.abs(intensities)))
+        emision = _find(wavelengths, intensities, umbral, sigma, ventana, "emision")
+        absorcion = _absorption(wavelengths, intensities, emision, umbral, sigma, ventana)
+        lineas = pd.DataFrame({k: np.concatenate([emision[k], absorcion[k]]) for k in emision})
+    else:
+        lineas = pd.DataFrame(columns=["longitud_onda", "indice", "tipo", "inicio", "fin", "prominencia", "significancia"])
+    lineas = lineas.sort_values("longitud_onda", ignore_index=True)
+    lineas["ancho"] = lineas["fin"] - lineas["inicio"]
+    lineas["flujo"] = intensities[lineas["indice"].to_numpy(dtype=int)]
+    lineas["linea"] = _identify(
+        lineas["longitud_onda"].to_numpy(dtype=float), lineas["significancia"].to_numpy(dtype=float),
+        lineas["tipo"].to_numpy(dtype=object), z, tolerancia
+    )
+
+    with _cache_lock:
+        _cache[clave] = lineas
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return lineas
+
+
+def prime_cache(lineas, wavelengths, intensities=None, min_significancia=5.0, min_contraste=0.1, z=None,
+                tolerancia=8.0, ventana=41):
+    """
+    Guarda en la caché de detect_lines un índice ya calculado (por ejemplo, en otro proceso)
+    para el espectro y los parámetros dados, que son los mismos de detect_lines.
+    """
+    espectro = as_spectrum(wavelengths, intensities)
+    if z is None:
+        z = espectro.z or 0.0
+    clave = _cache_key(espectro, min_significancia, min_contraste, z, tolerancia, ventana)
+    with _cache_lock:
+        _cache[clave] = lineas
+        _cache.move_to_end(clave)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def lines_to_array(lineas):
+    """
+    Índice de líneas como arreglo float (n, 8), para compartirlo entre procesos. Columnas:
+    longitud_onda, indice, emisión (1/0), inicio, fin, prominencia, significancia y posición
+    de la línea en KNOWN_LINES (-1 si no está identificada).
+    """
+    nombres = list(KNOWN_LINES)
+    posiciones = [nombres.index(linea) if isinstance(linea, str) else -1 for linea in lineas["linea"]]
+    return np.column_stack([
+        lineas["longitud_onda"].to_numpy(dtype=float),
+        lineas["indice"].to_numpy(dtype=float),
+        (lineas["tipo"] == "emision").to_numpy(dtype=float),
+        lineas["inicio"].to_numpy(dtype=float),
+        lineas["fin"].to_numpy(dtype=float),
+        lineas["prominencia"].to_numpy(dtype=float),
+        lineas["significancia"].to_numpy(dtype=float),
+        np.asarray(posiciones, dtype=float),
+    ])
+
+
+def lines_from_array(arreglo, intensities):
+    """
+    Inverso de lines_to_array: el DataFrame de detect_lines para el flujo dado.
+    """
+    import pandas as pd
+
+    indices = arreglo[:, 1].astype(int)
+    lineas = pd.DataFrame({
+        "longitud_onda": arreglo[:, 0],
+        "indice": indices,
+        "tipo": np.where(arreglo[:, 2] > 0, "emision", "absorcion").astype(object),
+        "inicio": arreglo[:, 3],
+        "fin": arreglo[:, 4],
+        "prominencia": arreglo[:, 5],
+        "significancia": arreglo[:, 6],
+    })
+    lineas["ancho"] = lineas["fin"] - lineas["inicio"]
+    lineas["flujo"] = np.asarray(intensities, dtype=float)[indices]
+    posiciones = arreglo[:, 7].astype(int)
+    identificadas = np.full(len(posiciones), None, dtype=object)
+    identificadas[posiciones >= 0] = np.array(list(KNOWN_LINES), dtype=object)[posiciones[posiciones >= 0]]
+    lineas["linea"] = identificadas
+    return lineas
+
+
+def line_window_mask(wavelengths, lineas, margen=1.0, solo_identificadas=True):
+    """
+    Máscara booleana de las muestras que caen dentro de alguna línea detectada,
+    ampliando cada ventana en margen veces su ancho a cada lado.
+    Por defecto solo usa las líneas identificadas con KNOWN_LINES.
+    """
+    wavelengths = np.asarray(wavelengths, dtype=float)
+    if solo_identificadas:
+        lineas = lineas[lineas["linea"].notna()]
+    if len(lineas) == 0:
+        return np.zeros(len(wavelengths), dtype=bool)
+    ancho = lineas["ancho"].to_numpy(dtype=float)
+    return _window_mask(wavelengths, lineas["inicio"].to_numpy(dtype=float) - margen * ancho,
+                        lineas["fin"].to_numpy(dtype=float) + margen * ancho)
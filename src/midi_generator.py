@@ -1,6 +1,4 @@
 # src/midi_generator.py
-from midiutil import MIDIFile
-from midi2audio import FluidSynth
 import os
 import subprocess
 
@@ -8,6 +6,8 @@ def create_midi_file(notes, velocities, output_file="output.mid", tempo=120):
     """
     Genera un archivo MIDI dado un conjunto de notas y velocidades.
     """
+    from midiutil import MIDIFile
+
     track = 0
     channel = 0
     time = 0  # inicio
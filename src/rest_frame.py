@@ -0,0 +1,87 @@
+# src/rest_frame.py
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+from src.spectrum import as_spectrum
+
+# Malla común por defecto (Å, marco en reposo): cubre el rango de los espectros de NED en data/
+DEFAULT_GRID = (3650.0, 7100.0, 2.0)
+CACHE_SIZE = 128
+
+_REDSHIFT_RE = re.compile(r"(?:^|[#\s;,])(?:z|redshift)\s*[=:]\s*([-+]?\d*\.?\d+(?:[eE][-+]?\d+)?)", re.IGNORECASE)
+
+# (huella del espectro, z, malla) -> flujo remuestreado (LRU)
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def parse_header_redshift(lineas):
+    """
+    Busca un redshift declarado en el encabezado (por ejemplo "# z = 0.0029").
+    Retorna None si no hay ninguno.
+    """
+    for linea in lineas:
+        coincidencia = _REDSHIFT_RE.search(linea)
+        if coincidencia:
+            return float(coincidencia.group(1))
+    return None
+
+
+def to_rest_frame(wavelengths, z):
+    """
+    Lleva las longitudes de onda observadas al marco en reposo: λ_reposo = λ_obs / (1 + z).
+    """
+    return np.asarray(wavelengths, dtype=float) / (1.0 + z)
+
+
+@lru_cache(maxsize=16)
+def rest_grid(inicio=DEFAULT_GRID[0], fin=DEFAULT_GRID[1], paso=DEFAULT_GRID[2]):
+    """
+    Malla de longitudes de onda común (incluye fin si cae en la malla). Solo lectura.
+    """
+    grid = np.arange(inicio, fin + paso / 2, paso)
+    grid.setflags(write=False)
+    return grid
+
+
+def resample_to_grid(wavelengths, intensities=None, z=None, grid=DEFAULT_GRID):
+    """
+    Quita el redshift y remuestrea el flujo sobre la malla (inicio, fin, paso) con np.interp.
+    Fuera del rango cubierto por el espectro el flujo es NaN.
+    wavelengths también puede ser un Spectrum sin intensities; si z es None se usa su z (o 0).
+    El resultado (solo lectura) queda en caché por (espectro, z, malla).
+    """
+    espectro = as_spectrum(wavelengths, intensities)
+    if z is None:
+        z = espectro.z or 0.0
+    grid = tuple(float(x) for x in grid)
+    clave = (espectro.fingerprint, float(z), grid)
+    with _cache_lock:
+        if clave in _cache:
+            _cache.move_to_end(clave)
+            return _cache[clave]
+
+    flujo = np.interp(rest_grid(*grid), to_rest_frame(espectro.wavelengths, z), espectro.intensities,
+                      left=np.nan, right=np.nan)
+    flujo.setflags(write=False)
+    with _cache_lock:
+        _cache[clave] = flujo
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return flujo
+
+
+def resample_batch(espectros, grid=DEFAULT_GRID):
+    """
+    Remuestrea varios espectros [(wavelengths, intensities, z), ...] sobre la misma malla.
+    Retorna (malla, matriz de forma (n_espectros, len(malla))).
+    """
+    filas = [resample_to_grid(wavelengths, intensities, z, grid) for wavelengths, intensities, z in espectros]
+    malla = rest_grid(*(float(x) for x in grid))
+    if not filas:
+        return malla, np.empty((0, len(malla)))
+    return malla, np.vstack(filas)
@@ -0,0 +1,112 @@
+# src/scales.py
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+
+NOTE_NAMES = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
+MAX_DIVISIONS = 96
+
+# Nombre -> (intervalos, divisiones de la octava). Los intervalos se cuentan en pasos de
+# 1/divisiones de octava desde Do; con 12 divisiones son semitonos
+SCALES = {
+    "Armónica Menor": ((0, 2, 3, 5, 7, 8, 11), 12),
+    "Pentatónica Menor": ((0, 3, 5, 7, 10), 12),
+    "Mayor": ((0, 2, 4, 5, 7, 9, 11), 12),
+    "Menor Natural": ((0, 2, 3, 5, 7, 8, 10), 12),
+    "Cromática": (tuple(range(12)), 12),
+    "Pentatónica de La menor": ((0, 2, 4, 7, 9), 12),
+    "Armónica de La menor": ((0, 2, 4, 5, 8, 9, 11), 12),
+    "La Mayor": ((1, 2, 4, 6, 8, 9, 11), 12),
+    "La Menor Natural": ((0, 2, 4, 5, 7, 9, 11), 12),
+    "Cuartos de tono (24-TET)": (tuple(range(24)), 24),
+    "Maqam Rast (24-TET)": ((0, 4, 7, 10, 14, 18, 21), 24),
+}
+DEFAULT_SCALE = "Armónica Menor"
+
+# Nombres que usaba el parámetro `escala` de funciones.py
+_ALIASES = {
+    "pentatonica_am": "Pentatónica de La menor",
+    "armonica_am": "Armónica de La menor",
+    "mayor_a": "La Mayor",
+    "menor_a": "La Menor Natural",
+}
+
+
+class CompiledScale(NamedTuple):
+    """
+    Tablas de una escala sobre una malla de num_pasos pasos (1/divisiones de octava)
+    que empieza en nota_minima. Todas se indexan por paso de la malla.
+    """
+    divisiones: int
+    nota_minima: int
+    num_pasos: int
+    malla: np.ndarray  # altura de cada paso, en semitonos MIDI (float)
+    en_escala: np.ndarray  # True si el paso pertenece a la escala
+    notas: np.ndarray  # nota MIDI de la altura más cercana de la escala
+    bends: np.ndarray  # desviación (semitonos) de esa altura respecto a la nota MIDI
+
+
+def resolve_scale(notas_escala=None, divisiones=12, escala=None):
+    """
+    Retorna (intervalos, divisiones) a partir de intervalos explícitos o del nombre de una
+    escala de SCALES; sin ninguno de los dos, la escala cromática de `divisiones` pasos.
+    """
+    if notas_escala is None and escala is not None:
+        nombre = _ALIASES.get(escala, escala)
+        if nombre not in SCALES:
+            raise ValueError(f"Escala desconocida: {escala}")
+        notas_escala, divisiones = SCALES[nombre]
+    divisiones = int(divisiones)
+    if not 1 <= divisiones <= MAX_DIVISIONS:
+        raise ValueError(f"Las divisiones de la octava deben estar entre 1 y {MAX_DIVISIONS}.")
+    if notas_escala is None:
+        notas_escala = range(divisiones)
+    return tuple(sorted({int(i) % divisiones for i in notas_escala})), divisiones
+
+
+@lru_cache(maxsize=64)
+def compile_scale(intervalos, divisiones=12, nota_minima=36, num_octavas=5):
+    """
+    Compila la escala una sola vez en tablas de consulta (ver CompiledScale): cada paso de
+    la malla queda asignado a la altura más cercana de la escala, buscando primero hacia
+    arriba en caso de empate. Si ningún paso pertenece a la escala, cada paso se conserva.
+    Las alturas microtonales se expresan como nota MIDI más pitch bend.
+    intervalos debe ser una tupla (es la clave de la caché); los arreglos son de solo lectura.
+    """
+    intervalos, divisiones = resolve_scale(intervalos, divisiones)
+    num_pasos = num_octavas * divisiones
+    pasos = np.arange(num_pasos)
+    malla = nota_minima + pasos * 12.0 / divisiones
+    # Clase de altura de cada paso (0 = Do), contando desde la nota mínima
+    inicio = int(round(nota_minima * divisiones / 12))
+    en_escala = np.isin((inicio + pasos) % divisiones, intervalos)
+
+    destino = pasos
+    validos = np.flatnonzero(en_escala)
+    if len(validos) > 0:
+        # Paso de la escala más cercano por arriba y por abajo de cada paso
+        # (fuera de la malla se usa un paso inalcanzable, a más de num_pasos de distancia)
+        pos = np.searchsorted(validos, pasos, side="left")
+        arriba = np.where(pos < len(validos), validos[np.minimum(pos, len(validos) - 1)], 3 * num_pasos)
+        pos = np.searchsorted(validos, pasos, side="right") - 1
+        abajo = np.where(pos >= 0, validos[np.maximum(pos, 0)], -3 * num_pasos)
+        destino = np.where(arriba - pasos <= pasos - abajo, arriba, abajo)
+
+    alturas = malla[destino]
+    notas = np.floor(alturas + 0.5).astype(int)
+    bends = alturas - notas
+    for arreglo in (malla, en_escala, notas, bends):
+        arreglo.setflags(write=False)
+    return CompiledScale(divisiones, nota_minima, num_pasos, malla, en_escala, notas, bends)
+
+
+def pitch_name(altura, con_octava=True):
+    """
+    Nombre de una altura en semitonos MIDI, con la desviación en cents si no es
+    una nota de la escala temperada (por ejemplo "E4-50¢").
+    """
+    nota = int(np.floor(altura + 0.5))
+    cents = int(round((altura - nota) * 100))
+    nombre = NOTE_NAMES[nota % 12] + (str(nota // 12 - 1) if con_octava else "")
+    return nombre + (f"{cents:+d}¢" if cents else "")
@@ -0,0 +1,183 @@
+# src/shared_store.py
+"""
+Arreglos compartidos entre procesos. Hoy se publican los espectros (longitud de
+onda y flujo); los valores derivados (líneas, mallas, región plana) los calcula
+cada worker y quedan en sus cachés.
+
+El proceso dueño publica los arreglos una sola vez en archivos .npy dentro de
+/dev/shm (memoria compartida en Linux; en otros sistemas, la carpeta temporal)
+y los workers los abren con np.load(mmap_mode="r"): todos los procesos leen las
+mismas páginas, sin copias y en modo solo lectura, así que la memoria no crece
+con el número de workers.
+
+El dueño lleva la cuenta de referencias de cada clave y borra los archivos
+cuando la última referencia se libera (o al cerrar el almacén).
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+MAX_ATTACHED = 256
+DIR_PREFIX = "galaxysonification-"
+
+
+def _default_dir():
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, f"{DIR_PREFIX}{os.getpid()}")
+
+
+def _remove_stale_dirs(base):
+    """
+    Borra carpetas de almacenes de procesos que ya no existen (por ejemplo, tras un SIGKILL).
+    """
+    if os.name != "posix":
+        return  # En Windows os.kill(pid, 0) terminaría el proceso en lugar de consultarlo
+    for nombre in os.listdir(base):
+        pid = nombre[len(DIR_PREFIX):]
+        if not nombre.startswith(DIR_PREFIX) or not pid.isdigit():
+            continue
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            shutil.rmtree(os.path.join(base, nombre), ignore_errors=True)
+        except PermissionError:
+            pass  # El proceso existe pero es de otro usuario
+
+
+class SharedArrayStore:
+    """
+    Lado del dueño: publica arreglos bajo una clave y cuenta referencias.
+    """
+
+    def __init__(self, directorio=None):
+        self.directorio = directorio or _default_dir()
+        _remove_stale_dirs(os.path.dirname(self.directorio))
+        os.makedirs(self.directorio, exist_ok=True)
+        self._entradas = {}  # clave -> [descriptor, referencias]
+        self._generacion = 0
+        self._lock = threading.Lock()
+
+    def __contains__(self, clave):
+        with self._lock:
+            return clave in self._entradas
+
+    def publish(self, clave, atributos=None, **arreglos):
+        """
+        Publica los arreglos bajo la clave (o reutiliza los ya publicados) y suma
+        una referencia. atributos (un diccionario pequeño, por ejemplo el redshift)
+        viaja tal cual en el descriptor.
+        Retorna el descriptor que se pasa a attach() en los workers.
+        """
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                entrada[1] += 1
+                return entrada[0]
+            self._generacion += 1
+            generacion = self._generacion
+
+        base = hashlib.blake2b(repr(clave).encode(), digest_size=8).hexdigest()
+        rutas = {}
+        for nombre, arreglo in arreglos.items():
+            ruta = os.path.join(self.directorio, f"{base}-{generacion}-{nombre}.npy")
+            temporal = ruta + ".tmp"
+            with open(temporal, "wb") as f:
+                np.save(f, np.ascontiguousarray(arreglo))
+            os.replace(temporal, ruta)
+            rutas[nombre] = ruta
+        descriptor = {"clave": clave, "rutas": rutas, "atributos": dict(atributos or {})}
+
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                # Otro hilo publicó la misma clave mientras escribíamos: se usa la suya
+                entrada[1] += 1
+                _remove_files(rutas)
+                return entrada[0]
+            self._entradas[clave] = [descriptor, 1]
+        return descriptor
+
+    def acquire(self, clave):
+        """
+        Suma una referencia a una clave ya publicada y retorna su descriptor (o None).
+        """
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                return None
+            entrada[1] += 1
+            return entrada[0]
+
+    def release(self, clave):
+        """
+        Resta una referencia; con la última se borran los archivos compartidos.
+        """
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                return
+            entrada[1] -= 1
+            if entrada[1] > 0:
+                return
+            del self._entradas[clave]
+        _remove_files(entrada[0]["rutas"])
+
+    def close(self):
+        with self._lock:
+            self._entradas.clear()
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+
+def _remove_files(rutas):
+    for ruta in rutas.values():
+        try:
+            os.remove(ruta)
+        except OSError:
+            # En Windows un archivo mapeado no se puede borrar; close() limpia la carpeta al final
+            pass
+
+
+# --- Lado de los workers -----------------------------------------------------
+
+# (clave, nombre) -> ((ruta,), arreglo mapeado en este proceso) (LRU)
+_attached = OrderedDict()
+_attached_lock = threading.Lock()
+
+
+def prune_unlinked(cache):
+    """
+    Quita de una caché {clave: (rutas, valor)} las entradas cuyos archivos ya se borraron:
+    un mapa abierto mantiene vivo el archivo aunque el dueño lo haya liberado.
+    """
+    for clave in [c for c, (rutas, _) in cache.items() if not all(os.path.exists(r) for r in rutas)]:
+        del cache[clave]
+
+
+def attach(descriptor):
+    """
+    Abre los arreglos de un descriptor sin copiarlos, en modo solo lectura.
+    Los mapas se reutilizan entre llamadas dentro del mismo proceso, por clave y nombre:
+    si la clave se republicó (otra generación, otras rutas) el mapa viejo se reemplaza.
+    Retorna un diccionario nombre -> arreglo.
+    """
+    arreglos = {}
+    with _attached_lock:
+        for nombre, ruta in descriptor["rutas"].items():
+            clave = (descriptor["clave"], nombre)
+            entrada = _attached.get(clave)
+            if entrada is None or entrada[0] != (ruta,):
+                # Antes de abrir otro mapa se sueltan los de archivos que el dueño ya borró
+                prune_unlinked(_attached)
+                # np.asarray deja una vista ndarray común sobre el mapa (sin copiar)
+                entrada = ((ruta,), np.asarray(np.load(ruta, mmap_mode="r")))
+                _attached[clave] = entrada
+            _attached.move_to_end(clave)
+            arreglos[nombre] = entrada[1]
+        while len(_attached) > MAX_ATTACHED:
+            _attached.popitem(last=False)
+    return arreglos
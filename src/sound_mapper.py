@@ -4,7 +4,9 @@ def map_values_to_midi_notes(data, scale=(60, 72)):
     Convierte valores Y en notas MIDI dentro de un rango dado.
     Retorna una lista de notas.
     """
-    y_values = data[:, 1]
+    from src.spectrum import as_spectrum
+
+    y_values = as_spectrum(data).intensities
     min_val, max_val = y_values.min(), y_values.max()
     midi_min, midi_max = scale
 
@@ -16,5 +18,73 @@ def map_to_velocity(data, min_vel=40, max_vel=100):
     """
     Escala el eje Y como velocidad (intensidad).
     """
-    y = data[:, 1]
+    from src.spectrum import as_spectrum
+
+    y = as_spectrum(data).intensities
     return ((y - y.min()) / (y.max() - y.min()) * (max_vel - min_vel) + min_vel).astype(int)
+
+def map_expression(intensities, notes, mean_intensity, duracion_nota=1.0, min_vel=40, max_vel=120,
+                   legato=(0.6, 1.0), dinamica=True, fusionar=True, pitch_bend=False, max_bend=0.5,
+                   afinacion=None):
+    """
+    Calcula de una sola vez la expresión de cada nota a partir del flujo:
+    - velocidad según la profundidad de la línea (desviación respecto a mean_intensity),
+    - duración (articulación) según la pendiente local: más corta donde el flujo cambia rápido,
+    - pitch bend opcional (en semitonos, hasta max_bend) según el signo y tamaño de la pendiente.
+    Si fusionar es True, las notas consecutivas iguales del mismo tipo (emisión/absorción)
+    se unen en una sola nota sostenida.
+    afinacion (opcional) es la desviación en semitonos de cada nota respecto a la nota MIDI
+    (escalas microtonales): se suma al bend, y dos notas iguales con distinta afinación no se unen.
+    Retorna un diccionario de arreglos con una entrada por nota:
+    "inicio" (índice de muestra), "tiempo", "duracion", "nota", "velocidad", "bend", "emision".
+    """
+    import numpy as np
+
+    intensities = np.asarray(intensities, dtype=float)
+    notes = np.asarray(notes, dtype=int)
+    n = len(intensities)
+    if n == 0:
+        vacio = np.array([], dtype=float)
+        return {"inicio": np.array([], dtype=int), "tiempo": vacio, "duracion": vacio,
+                "nota": np.array([], dtype=int), "velocidad": np.array([], dtype=int),
+                "bend": vacio, "emision": np.array([], dtype=bool)}
+
+    desviacion = intensities - mean_intensity
+    emision = desviacion >= 0
+    pendiente = np.gradient(intensities) if n > 1 else np.zeros(n)
+    max_pendiente = np.max(np.abs(pendiente))
+    pendiente_norm = pendiente / max_pendiente if max_pendiente > 0 else np.zeros(n)
+
+    if dinamica:
+        # Profundidad relativa al continuo; la raíz da más resolución a las líneas débiles
+        profundidad = np.abs(desviacion) / abs(mean_intensity) if mean_intensity else np.abs(desviacion)
+        max_profundidad = np.max(profundidad)
+        profundidad_norm = profundidad / max_profundidad if max_profundidad > 0 else np.zeros(n)
+        velocidades = min_vel + (max_vel - min_vel) * np.sqrt(profundidad_norm)
+        factor_duracion = legato[1] - (legato[1] - legato[0]) * np.abs(pendiente_norm)
+    else:
+        velocidades = np.full(n, 100.0)
+        factor_duracion = np.ones(n)
+    bends = pendiente_norm * max_bend if pitch_bend else np.zeros(n)
+    afinacion = np.zeros(n) if afinacion is None else np.asarray(afinacion, dtype=float)
+
+    if fusionar:
+        cambio = np.empty(n, dtype=bool)
+        cambio[0] = True
+        cambio[1:] = (notes[1:] != notes[:-1]) | (emision[1:] != emision[:-1]) | (afinacion[1:] != afinacion[:-1])
+        inicios = np.flatnonzero(cambio)
+    else:
+        inicios = np.arange(n)
+    finales = np.append(inicios[1:], n)
+    largos = finales - inicios
+
+    return {
+        "inicio": inicios,
+        "tiempo": inicios * duracion_nota,
+        # La nota sostenida ocupa todos sus pasos menos el último, que conserva su articulación
+        "duracion": (largos - 1 + factor_duracion[finales - 1]) * duracion_nota,
+        "nota": notes[inicios],
+        "velocidad": np.clip(np.round(np.maximum.reduceat(velocidades, inicios)), 1, 127).astype(int),
+        "bend": np.add.reduceat(bends, inicios) / largos + afinacion[inicios],
+        "emision": emision[inicios],
+    }
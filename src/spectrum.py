@@ -0,0 +1,181 @@
+# src/spectrum.py
+import hashlib
+
+import numpy as np
+
+
+def spectrum_fingerprint(wavelengths, intensities):
+    h = hashlib.blake2b(digest_size=16)
+    h.update(np.ascontiguousarray(wavelengths, dtype=float).tobytes())
+    h.update(np.ascontiguousarray(intensities, dtype=float).tobytes())
+    return h.hexdigest()
+
+
+def _read_only(arreglo):
+    # Sin copia si ya es float contiguo (por ejemplo, un arreglo en memoria compartida)
+    arreglo = np.ascontiguousarray(arreglo, dtype=float)
+    if arreglo.flags.writeable:
+        # Vista propia: no cambia los flags del arreglo del llamador
+        arreglo = arreglo.view()
+        arreglo.flags.writeable = False
+    return arreglo
+
+
+def _flat_region(intensidades, ventana, suavizado, rango_central):
+    from scipy.ndimage import uniform_filter1d
+
+    if suavizado > 1:
+        intensidades = uniform_filter1d(intensidades, size=suavizado)
+    n = len(intensidades) - ventana  # ventanas que se evalúan
+    if n <= 0:
+        return None
+    # Media y desviación móviles con sumas acumuladas (O(n) en lugar de O(n·ventana));
+    # centrar antes de acumular evita perder precisión al restar sumas grandes
+    centro = float(np.mean(intensidades))
+    x = intensidades - centro
+    suma = np.concatenate(([0.0], np.cumsum(x)))
+    suma_cuadrados = np.concatenate(([0.0], np.cumsum(x * x)))
+    medias = (suma[ventana:ventana + n] - suma[:n]) / ventana
+    varianzas = (suma_cuadrados[ventana:ventana + n] - suma_cuadrados[:n]) / ventana - medias ** 2
+    stds = np.sqrt(np.maximum(varianzas, 0.0))
+    medias += centro
+
+    # Primera ventana dentro del rango dado y con poca dispersión
+    planos = np.flatnonzero(
+        (medias >= rango_central[0]) & (medias <= rango_central[1]) & (stds < np.median(stds) * 0.5)
+    )
+    if len(planos) == 0:
+        return None
+    return float(medias[planos[0]]), float(stds[planos[0]])
+
+
+def _flat_region_key(ventana, suavizado, rango_central):
+    return ("flat_region", int(ventana), int(suavizado), tuple(float(x) for x in rango_central))
+
+
+class Spectrum:
+    """
+    Espectro (longitud de onda, flujo) con arreglos float contiguos de solo lectura.
+    Los valores derivados (extremos, región plana, huella) se calculan una sola vez
+    y quedan guardados en el objeto; select() retorna vistas sin copiar los datos.
+    """
+
+    __slots__ = ("wavelengths", "intensities", "z", "nombre", "_cache")
+
+    def __init__(self, wavelengths, intensities, z=None, nombre=None):
+        self.wavelengths = _read_only(wavelengths)
+        self.intensities = _read_only(intensities)
+        if self.wavelengths.ndim != 1 or self.wavelengths.shape != self.intensities.shape:
+            raise ValueError("Se esperaban dos arreglos 1D del mismo largo: longitud de onda y flujo.")
+        self.z = None if z is None else float(z)
+        self.nombre = nombre
+        self._cache = {}
+
+    @classmethod
+    def from_dataframe(cls, datos, z=None, nombre=None):
+        """
+        Toma las dos primeras columnas (longitud de onda, flujo) de un DataFrame.
+        """
+        if z is None:
+            z = datos.attrs.get("z")
+        return cls(datos.iloc[:, 0].to_numpy(dtype=float), datos.iloc[:, 1].to_numpy(dtype=float), z, nombre)
+
+    def to_dataframe(self):
+        import pandas as pd
+
+        datos = pd.DataFrame({0: self.wavelengths, 1: self.intensities}, copy=False)
+        datos.attrs["z"] = self.z
+        return datos
+
+    def __len__(self):
+        return len(self.wavelengths)
+
+    def __repr__(self):
+        return f"Spectrum(nombre={self.nombre!r}, n={len(self)}, z={self.z})"
+
+    def __reduce__(self):
+        # Los valores guardados no viajan: se recalculan en el otro proceso si hacen falta
+        return (self.__class__, (self.wavelengths, self.intensities, self.z, self.nombre))
+
+    def _memo(self, clave, calcular):
+        if clave not in self._cache:
+            self._cache[clave] = calcular()
+        return self._cache[clave]
+
+    @property
+    def min_wavelength(self):
+        return self._memo("min_wavelength", lambda: float(np.min(self.wavelengths)))
+
+    @property
+    def max_wavelength(self):
+        return self._memo("max_wavelength", lambda: float(np.max(self.wavelengths)))
+
+    @property
+    def min_intensity(self):
+        return self._memo("min_intensity", lambda: float(np.min(self.intensities)))
+
+    @property
+    def max_intensity(self):
+        return self._memo("max_intensity", lambda: float(np.max(self.intensities)))
+
+    @property
+    def is_sorted(self):
+        return self._memo("is_sorted", lambda: bool(np.all(np.diff(self.wavelengths) >= 0)))
+
+    @property
+    def fingerprint(self):
+        """
+        Huella del contenido: la clave común de las cachés por espectro.
+        """
+        return self._memo("fingerprint", lambda: spectrum_fingerprint(self.wavelengths, self.intensities))
+
+    def take(self, indices):
+        """
+        Subconjunto de muestras (slice, máscara o índices) como un nuevo Spectrum.
+        """
+        return Spectrum(self.wavelengths[indices], self.intensities[indices], self.z, self.nombre)
+
+    def select(self, rango_onda):
+        """
+        Muestras con rango_onda[0] <= λ <= rango_onda[1]. Si las longitudes de onda están
+        ordenadas se ubican por búsqueda binaria y el resultado es una vista sin copia.
+        """
+        inicio, fin = rango_onda
+        if not self.is_sorted:
+            return self.take((self.wavelengths >= inicio) & (self.wavelengths <= fin))
+        a = int(np.searchsorted(self.wavelengths, inicio, side="left"))
+        b = int(np.searchsorted(self.wavelengths, fin, side="right"))
+        if a == 0 and b == len(self):
+            return self  # rango completo: se conservan los valores ya calculados
+        return self.take(slice(a, b))
+
+    def flat_region(self, ventana=100, suavizado=10, rango_central=(0.95, 1.05)):
+        """
+        (media, desviación) de la primera región plana del flujo suavizado: una ventana de
+        `ventana` muestras con media dentro de rango_central y desviación menor que la mitad
+        de la mediana. Retorna None si no hay ninguna.
+        """
+        return self._memo(_flat_region_key(ventana, suavizado, rango_central),
+                          lambda: _flat_region(self.intensities, int(ventana), suavizado, rango_central))
+
+    def remember_flat_region(self, region, ventana=100, suavizado=10, rango_central=(0.95, 1.05)):
+        """
+        Guarda una región plana ya calculada (por ejemplo, en otro proceso) para esos parámetros.
+        """
+        self._cache[_flat_region_key(ventana, suavizado, rango_central)] = region
+
+
+def as_spectrum(datos, intensities=None):
+    """
+    Retorna datos como Spectrum: un Spectrum se usa tal cual, un DataFrame o un arreglo
+    (n, 2) aportan sus dos primeras columnas y, si no, datos e intensities son los arreglos
+    de longitud de onda y flujo.
+    """
+    if isinstance(datos, Spectrum):
+        return datos
+    if intensities is None and hasattr(datos, "iloc"):
+        return Spectrum.from_dataframe(datos)
+    if intensities is None and np.ndim(datos) == 2:
+        datos = np.asarray(datos, dtype=float)
+        return Spectrum(datos[:, 0], datos[:, 1])
+    return Spectrum(datos, intensities)